@@ -1,746 +1,1461 @@
+import heapq
+import importlib
 import random
+import struct
+from array import array
+from collections import OrderedDict, deque
+
+# Event types written to the binary event log
+EVENT_HIT, EVENT_FAULT, EVENT_EVICT, EVENT_ALLOC, EVENT_FREE, EVENT_PREFETCH, EVENT_ZSWAP_FAULT, \
+    EVENT_ZSWAP_WRITEBACK, EVENT_TRANSLATE = range(9)
+EVENT_NAMES = ('hit', 'fault', 'evict', 'alloc', 'free', 'prefetch', 'zswap_fault', 'zswap_writeback', 'translate')
+
+# One fixed-size record per event: op index, event type, page_id, frame, disk slot, clock delta.
+# Missing frame / disk slot values are stored as -1.
+EVENT_RECORD = struct.Struct('<IBIiid')
+EVENT_FIELDS = ('op', 'event', 'page_id', 'frame', 'disk_slot', 'clock_delta')
+EVENT_DTYPE = [('op', '<u4'), ('event', 'u1'), ('page_id', '<u4'),
+               ('frame', '<i4'), ('disk_slot', '<i4'), ('clock_delta', '<f8')]
+
+
+class EventLog:
+    """ Buffered binary log of MMU events, flushed to disk in bulk """
+
+    def __init__(self, path, buffer_size=1 << 20):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.event_count = 0
+        self.file = open(path, 'wb')
+
+    def record(self, op_index, event_type, page_id, frame=None, disk_slot=None, clock_delta=0):
+        self.buffer += EVENT_RECORD.pack(op_index, event_type, page_id,
+                                         -1 if frame is None else frame,
+                                         -1 if disk_slot is None else disk_slot,
+                                         clock_delta)
+        self.event_count += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer = bytearray()
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_event_log(path):
+    """ Load an event log as a NumPy structured array, or as columns of lists without NumPy """
+    try:
+        import numpy
+    except ImportError:
+        with open(path, 'rb') as file:
+            rows = list(EVENT_RECORD.iter_unpack(file.read()))
+        return {name: [row[i] for row in rows] for i, name in enumerate(EVENT_FIELDS)}
+    return numpy.fromfile(path, dtype=numpy.dtype(EVENT_DTYPE))
+
+
+class FixedRatio:
+    """ Every page compresses by the same ratio """
+
+    def __init__(self, ratio=3.0):
+        self.ratio = ratio
+
+    def compressed_size(self, page_id, page_size):
+        return int(-(-page_size // self.ratio))
+
+    def __repr__(self):
+        return f"FixedRatio({self.ratio})"
+
+
+class UniformRatio:
+    """ Each page gets a ratio drawn uniformly from [low, high], stable for a given page_id and seed """
+
+    def __init__(self, low=1.5, high=4.0, seed=0):
+        self.low = low
+        self.high = high
+        self.seed = seed
+
+    def compressed_size(self, page_id, page_size):
+        ratio = random.Random(self.seed * 1000003 + page_id).uniform(self.low, self.high)
+        return int(-(-page_size // ratio))
+
+    def __repr__(self):
+        return f"UniformRatio({self.low}, {self.high}, seed={self.seed})"
+
+
+class MachineConfig:
+    """ Machine model shared by every MMU: page size, frame count and access costs """
+
+    def __init__(self, page_size=4096, frame_count=100, hit_cost=1, fault_cost=5, writeback_cost=5, prefetch_cost=1,
+                 zswap_capacity=0, zswap_store_cost=1, zswap_load_cost=1, compression=None,
+                 tlb_entries=0, tlb_ways=4, tlb_policy='lru', tlb_asid=True, tlb_cost=0,
+                 page_table_levels=0, page_table_bits=9, walk_cost=1):
+        if page_size <= 0:
+            raise ValueError("page_size must be positive")
+        if frame_count <= 0:
+            raise ValueError("frame_count must be positive")
+        self.page_size = page_size
+        self.frame_count = frame_count
+        self.hit_cost = hit_cost  # Clock units charged for each page found in RAM
+        self.fault_cost = fault_cost  # Clock units charged for reading a page in from disk
+        self.writeback_cost = writeback_cost  # Clock units charged for writing an evicted page to disk
+        self.prefetch_cost = prefetch_cost  # Clock units for each extra page read in the same batch as a fault
+        # Compressed RAM tier between RAM and disk (zswap style), disabled when zswap_capacity is 0
+        self.zswap_capacity = zswap_capacity  # Bytes of compressed pages the tier can hold
+        self.zswap_store_cost = zswap_store_cost  # Clock units to compress an evicted page into the tier
+        self.zswap_load_cost = zswap_load_cost  # Clock units to decompress a page back into RAM
+        self.compression = compression or FixedRatio()
+        # Address translation, both disabled by default
+        if tlb_policy not in ('lru', 'random'):
+            raise ValueError("tlb_policy must be 'lru' or 'random'")
+        if tlb_entries < 0:
+            raise ValueError("tlb_entries must not be negative")
+        if tlb_ways < 1:
+            raise ValueError("tlb_ways must be at least 1")
+        if page_table_levels < 0:
+            raise ValueError("page_table_levels must not be negative")
+        self.tlb_entries = tlb_entries  # Total TLB entries, 0 disables the TLB
+        self.tlb_ways = tlb_ways  # Entries per set
+        self.tlb_policy = tlb_policy  # Replacement inside a set: 'lru' or 'random'
+        self.tlb_asid = tlb_asid  # Tag entries with the pid; without ASIDs the TLB is flushed on every pid switch
+        self.tlb_cost = tlb_cost  # Clock units per TLB lookup
+        self.page_table_levels = page_table_levels  # Radix page table depth, 0 keeps the flat page_id -> frame dict
+        self.page_table_bits = page_table_bits  # Virtual page number bits resolved per level
+        self.walk_cost = walk_cost  # Clock units per page table level touched on a TLB miss
+        # Power-of-two pages size allocations with a shift instead of a division
+        self.page_shift = page_size.bit_length() - 1 if page_size & (page_size - 1) == 0 else None
+
+    def __repr__(self):
+        # Every setting, in a stable order; result caches key on it
+        settings = ', '.join(f"{name}={value!r}" for name, value in vars(self).items() if name != 'page_shift')
+        return f"MachineConfig({settings})"
+
+    def uses_randomness(self):
+        """ Whether runs under this config depend on the MMU's random seed """
+        return bool(self.tlb_entries) and self.tlb_policy == 'random'
+
+    def pages_for(self, size):
+        """ Number of pages needed to hold size bytes """
+        if self.page_shift is not None:
+            return (size + self.page_size - 1) >> self.page_shift
+        return (size + self.page_size - 1) // self.page_size
+
+
+class FrameList:
+    """ Doubly linked list of frame indexes backed by flat arrays: O(1) append, discard and move """
+
+    def __init__(self, frame_count, links=None, head=None):
+        if links is None:
+            links = (array('i', [-1]) * (frame_count + 1), array('i', [-1]) * (frame_count + 1))
+        self.next, self.prev = links
+        self.head = frame_count if head is None else head  # Sentinel node after the last real frame
+        self.next[self.head] = self.prev[self.head] = self.head
+        self.size = 0
+
+    @classmethod
+    def group(cls, frame_count, count):
+        """ count lists sharing one pair of link arrays, for frames that are in at most one of them at a time
+
+        Each list gets its own sentinel after the real frames. Membership tests then tell whether a frame is
+        in any list of the group, not in this one.
+        """
+        links = (array('i', [-1]) * (frame_count + count), array('i', [-1]) * (frame_count + count))
+        return [cls(frame_count, links, frame_count + k) for k in range(count)]
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, index):
+        return self.next[index] != -1
+
+    def __iter__(self):
+        index = self.next[self.head]
+        while index != self.head:
+            yield index
+            index = self.next[index]
+
+    def append(self, index):
+        last = self.prev[self.head]
+        self.next[last] = index
+        self.prev[index] = last
+        self.next[index] = self.head
+        self.prev[self.head] = index
+        self.size += 1
+
+    def discard(self, index):
+        next_index = self.next[index]
+        if next_index == -1:
+            return
+        prev_index = self.prev[index]
+        self.next[prev_index] = next_index
+        self.prev[next_index] = prev_index
+        self.next[index] = self.prev[index] = -1
+        self.size -= 1
+
+    def move_to_end(self, index):
+        self.discard(index)
+        self.append(index)
+
+    def first(self):
+        index = self.next[self.head]
+        return None if index == self.head else index
+
+    def last(self):
+        index = self.prev[self.head]
+        return None if index == self.head else index
+
 
 class Page:
+    __slots__ = ('page_id', 'logical_address', 'is_in_ram', 'physical_address', 'disk_address', 'pid',
+                 'reference_bit', 'dirty', 'prefetched')
     next_page_id = 1
 
-    def __init__(self, logical_address, is_in_ram, physical_address=None, disk_address=None, pid=None):
-        self.page_id = Page.next_page_id
-        Page.next_page_id += 1
+    def __init__(self, logical_address, is_in_ram, physical_address=None, disk_address=None, pid=None, page_id=None):
+        if page_id is None:
+            page_id = Page.next_page_id
+            Page.next_page_id += 1
+        self.page_id = page_id
         self.logical_address = logical_address
         self.is_in_ram = is_in_ram
         self.physical_address = physical_address
         self.disk_address = disk_address
         self.pid = pid
         self.reference_bit = 0  # Bit R added for Second Chance logic
-
-class OPT_MMU:
-    def __init__(self):
-        self.real_memory = [None] * 100  # Representa la memoria real con 100 Pages
-        self.virtual_memory = {}
-        self.future_uses = {}  # To keep track of future uses for optimal page replacement
-        self.page_reference_map = {}  # To store all future accesses for pages
-        self.ptr_page_map = {}
-        self.ptr_table = {}
-        self.logical_page_counter = 1
-        self.disk_page_counter = 1
-        self.ptr_id_counter = 1
-        self.clock = 0
-        self.thrashing_time = 0
-
-    def precalculate_future_uses(self, commands):
-        """ Precalculate future uses for all pages based on upcoming commands """
-        self.page_reference_map = {}
-        future_accesses = {}
-        for index, command in enumerate(commands[::-1]):  # Reverse to calculate the next use easily
-            if command['type'] == 'use':
-                ptr = command['ptr']
-                if ptr in self.ptr_table:
-                    for page_id in self.ptr_table[ptr][1]:
-                        if page_id not in future_accesses:
-                            future_accesses[page_id] = len(commands) - index  # Store the last future index
-        self.future_uses = future_accesses
-
-    def _optimal_page_to_replace(self):
-        """ Determine which page to replace using the optimal replacement strategy """
-        longest_future_use = -1
-        page_to_replace_index = None
-        for index, page in enumerate(self.real_memory):
-            if page and page.page_id in self.future_uses:
-                if self.future_uses[page.page_id] > longest_future_use:
-                    longest_future_use = self.future_uses[page.page_id]
-                    page_to_replace_index = index
-            elif page:  # If no future use found, immediately select it for replacement
-                return index
-        return page_to_replace_index if page_to_replace_index is not None else 0  # Fallback
-
-    def new(self, pid, size):
-        num_pages = (size + 4095) // 4096
-        ptr_id = self.ptr_id_counter
-        self.ptr_id_counter += 1
-        page_ids = []
-        for _ in range(num_pages):
-            logical_address = self.logical_page_counter
-            if None not in self.real_memory:
-                page_to_replace_index = self._optimal_page_to_replace()
-                page_to_replace = self.real_memory[page_to_replace_index]
-                # Evict page
-                self._evict_page(page_to_replace_index)
-                index = page_to_replace_index
+        self.dirty = False  # Bit M: written since it was last read in from disk
+        self.prefetched = False  # Read in ahead of demand and not used yet
+
+    def needs_writeback(self):
+        """ A page must be written on eviction if it was modified or has no disk copy yet """
+        return self.dirty or self.disk_address is None
+
+
+class CompressedTier:
+    """ Capacity-limited store of compressed pages; the least recently stored pages spill to disk first """
+
+    def __init__(self, capacity, compression, page_size):
+        self.capacity = capacity
+        self.compression = compression
+        self.page_size = page_size
+        self.sizes = OrderedDict()  # page_id -> compressed size, least recently stored first
+        self.used = 0
+
+    def __contains__(self, page_id):
+        return page_id in self.sizes
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def store(self, page_id):
+        """ Compress page_id into the tier; returns the page ids spilled to make room, or None if it can't fit """
+        size = self.compression.compressed_size(page_id, self.page_size)
+        if size > self.capacity:
+            return None
+        spilled = []
+        while self.used + size > self.capacity:
+            spilled_id, spilled_size = self.sizes.popitem(last=False)
+            self.used -= spilled_size
+            spilled.append(spilled_id)
+        self.sizes[page_id] = size
+        self.used += size
+        return spilled
+
+    def remove(self, page_id):
+        size = self.sizes.pop(page_id, None)
+        if size is not None:
+            self.used -= size
+
+
+class TLB:
+    """ Set-associative TLB mapping (asid, virtual page) to a frame, with LRU or random replacement per set """
+
+    def __init__(self, entries, ways, policy='lru', rng=random):
+        self.ways = ways
+        self.rng = rng  # Source of random victims for the 'random' policy
+        self.set_count = max(1, entries // ways)
+        self.sets = [OrderedDict() for _ in range(self.set_count)]
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+
+    def lookup(self, asid, vpn):
+        entries = self.sets[vpn % self.set_count]
+        frame = entries.get((asid, vpn))
+        if frame is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.policy == 'lru':
+            entries.move_to_end((asid, vpn))
+        return frame
+
+    def insert(self, asid, vpn, frame):
+        entries = self.sets[vpn % self.set_count]
+        key = (asid, vpn)
+        if key not in entries and len(entries) >= self.ways:
+            if self.policy == 'lru':
+                entries.popitem(last=False)
             else:
-                index = self.real_memory.index(None)
-
-            is_in_ram = True
-            physical_address = index
-            page = self._allocate_page(logical_address, is_in_ram, physical_address, None, pid)
-            page_ids.append(page.page_id)
-            self.real_memory[index] = page
-            self.ptr_page_map[page.page_id] = ptr_id
-            self.logical_page_counter += 1
-
-        self.ptr_table[ptr_id] = (pid, page_ids)
-        return ptr_id
-
-    def _evict_page(self, index):
-        evicted_page = self.real_memory[index]
-        old_ptr_id = self.ptr_page_map.get(evicted_page.page_id)
-        if old_ptr_id:
-            self.virtual_memory.setdefault(old_ptr_id, []).append({
-                'page_id': evicted_page.page_id,
-                'logical_address': evicted_page.logical_address,
-                'physical_address': None,
-                'disk_address': self.disk_page_counter,
-                'pid': evicted_page.pid
-            })
-            self.disk_page_counter += 1
-        self.real_memory[index] = None
-        self.clock += 5  # Simulate disk access time
-        self.thrashing_time += 5  # Add to thrashing time
-
-    def _allocate_page(self, logical_address, is_in_ram, physical_address, disk_address, pid):
-        return Page(logical_address, is_in_ram, physical_address, disk_address, pid)
-
-    def use(self, ptr):
-        if ptr in self.ptr_table:
-            _, page_ids = self.ptr_table[ptr]
-            for page_id in page_ids:
-                in_memory = False
-                for index, page in enumerate(self.real_memory):
-                    if page and page.page_id == page_id:
-                        in_memory = True
-                        self.clock += 1  # Add 1s to the clock for each hit
-                        # Refresh the future use data based on current state
-                        self._refresh_future_uses(page_id)
-                        break
-                if not in_memory:
-                    # Page needs to be swapped in from virtual memory
-                    self._swap_page_to_ram(page_id)
-        else:
-            print("Ptr not found in ptr table.")
-
-    def _swap_page_to_ram(self, page_id):
-        page_to_replace_index = self._optimal_page_to_replace()
-        if page_to_replace_index is not None:
-            self._evict_page(page_to_replace_index)
-        index = page_to_replace_index if page_to_replace_index is not None else self.real_memory.index(None)
-
-        # Fetching page from virtual memory
-        for ptr_id, pages in self.virtual_memory.items():
-            for page in pages:
-                if page['page_id'] == page_id:
-                    pid = page.get('pid', None)
-                    page_in_ram = self._allocate_page(page['logical_address'], True, index, None, pid)
-                    page_in_ram.page_id = page_id  # Retain original page ID
-                    self.real_memory[index] = page_in_ram
-                    pages.remove(page)
-                    self.ptr_page_map[page_id] = ptr_id
-                    self.clock += 5  # Simulate disk access time for a swap
-                    self.thrashing_time += 5  # Add to thrashing time
-                    self._refresh_future_uses(page_id)
-                    break
-
-    def _refresh_future_uses(self, page_id):
-        """Refresh the future use data when a page is accessed."""
-        if page_id in self.future_uses:
-            self.future_uses[page_id] = self.future_uses.get(page_id, float('inf')) - 1
-
-        if self.future_uses[page_id] <= 0:
-            del self.future_uses[page_id]  # Remove the page from future uses if no more references
-    
-    def delete(self, ptr):
-        if ptr in self.ptr_table:
-            _, page_ids = self.ptr_table.pop(ptr)  # Remove the ptr entry and get associated page ids
-            for index, page in enumerate(self.real_memory):
-                if page and page.page_id in page_ids:
-                    self.real_memory[index] = None  # Free the page from real memory
-                    if page.page_id in self.future_uses:
-                        del self.future_uses[page.page_id]  # Remove from future uses
-
-            # Remove pages from virtual memory
-            if ptr in self.virtual_memory:
-                del self.virtual_memory[ptr]  # Completely remove the ptr from virtual memory
-
-            print(f"Deleted ptr {ptr} and its associated pages from memory.")
-        else:
-            print("Ptr not found in ptr table.")
-
-    def kill(self, pid):
-        to_delete = []
-        # Collect all ptrs associated with this pid
-        for ptr_id, (pid_val, _) in list(self.ptr_table.items()):
-            if pid_val == pid:
-                to_delete.append(ptr_id)
+                del entries[self.rng.choice(list(entries))]
+        entries[key] = frame
+
+    def invalidate(self, asid, vpn):
+        self.sets[vpn % self.set_count].pop((asid, vpn), None)
+
+    def flush(self, asid=None):
+        """ Drop every entry, or only those tagged with asid """
+        self.flushes += 1
+        for entries in self.sets:
+            if asid is None:
+                entries.clear()
+            else:
+                for key in [key for key in entries if key[0] == asid]:
+                    del entries[key]
+
+
+class PageTable:
+    """ Per-process radix page table; a walk touches one node per level """
+
+    def __init__(self, levels, bits=9):
+        self.levels = levels
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.roots = {}  # pid -> top level node
+        self.nodes = 0  # Table nodes allocated, a proxy for page table memory
+
+    def _indexes(self, vpn):
+        # The top level is left unmasked so any vpn fits
+        indexes = [vpn >> (self.bits * (self.levels - 1))]
+        for level in range(self.levels - 2, -1, -1):
+            indexes.append((vpn >> (self.bits * level)) & self.mask)
+        return indexes
+
+    def map(self, pid, vpn, frame):
+        node = self.roots.get(pid)
+        if node is None:
+            node = self.roots[pid] = {}
+            self.nodes += 1
+        indexes = self._indexes(vpn)
+        for index in indexes[:-1]:
+            child = node.get(index)
+            if child is None:
+                child = node[index] = {}
+                self.nodes += 1
+            node = child
+        node[indexes[-1]] = frame
+
+    def unmap(self, pid, vpn):
+        node = self.roots.get(pid)
+        indexes = self._indexes(vpn)
+        path = []  # (parent node, index of the child) down to the last level
+        for index in indexes[:-1]:
+            if node is None:
+                return
+            path.append((node, index))
+            node = node.get(index)
+        if node is None or node.pop(indexes[-1], None) is None:
+            return
+        # Free the tables this left empty, bottom up
+        while not node and path:
+            parent, index = path.pop()
+            del parent[index]
+            self.nodes -= 1
+            node = parent
+        if not node:
+            del self.roots[pid]
+            self.nodes -= 1
+
+    def walk(self, pid, vpn):
+        """ Return (frame or None, levels touched) """
+        node = self.roots.get(pid)
+        levels = 0
+        for index in self._indexes(vpn):
+            if node is None:
+                return None, levels
+            levels += 1
+            node = node.get(index)
+        return node, levels
+
+    def drop(self, pid):
+        root = self.roots.pop(pid, None)
+        if root is not None:
+            self.nodes -= self._count(root, 1)
+
+    def _count(self, node, level):
+        # Tables at the last level hold frames, not further tables
+        if level == self.levels:
+            return 1
+        return 1 + sum(self._count(child, level + 1) for child in node.values())
+
+
+class Prefetcher:
+    """ Chooses swapped-out pages to read in together with a fault; the base class never prefetches """
+
+    def on_fault(self, mmu, ptr, page_id):
+        """ Page ids to read in the same batch as the faulting page_id of ptr """
+        return []
+
+    def on_use(self, mmu, ptr):
+        """ Page ids to read ahead after ptr has been used, without a fault """
+        return []
+
+
+class WholePtrPrefetcher(Prefetcher):
+    """ Read every swapped-out page of the ptr on its first fault """
+
+    def on_fault(self, mmu, ptr, page_id):
+        return [swapped_id for swapped_id in mmu.swapped_pages(ptr) if swapped_id != page_id]
+
+
+class SequentialPrefetcher(Prefetcher):
+    """ Read the next window pages of the ptr that follow the faulting page """
+
+    def __init__(self, window=4):
+        self.window = window
+
+    def on_fault(self, mmu, ptr, page_id):
+        _, page_ids = mmu.ptr_table[ptr]
+        position = page_ids.index(page_id)
+        swapped = mmu.virtual_memory.get(ptr, {})
+        return [next_id for next_id in page_ids[position + 1:position + 1 + self.window] if next_id in swapped]
+
+
+class StridePrefetcher(Prefetcher):
+    """ Detect a constant stride between used ptrs and read the predicted next ptrs ahead of time """
+
+    def __init__(self, degree=1):
+        self.degree = degree  # How many strides ahead to prefetch
+        self.last_ptr = None
+        self.stride = None
+        self.confirmed = False
+
+    def on_use(self, mmu, ptr):
+        if self.last_ptr is not None:
+            stride = ptr - self.last_ptr
+            self.confirmed = stride != 0 and stride == self.stride
+            self.stride = stride
+        self.last_ptr = ptr
+        if not self.confirmed:
+            return []
+        page_ids = []
+        for step in range(1, self.degree + 1):
+            page_ids.extend(mmu.swapped_pages(ptr + step * self.stride))
+        return page_ids
 
-        # Delete all ptrs collected
-        for ptr in to_delete:
-            self.delete(ptr)
 
-        print(f"All resources associated with PID {pid} have been successfully killed and freed.")
+class LoadController:
+    """ Load control above the replacement policy: suspends whole processes while their demand exceeds RAM """
 
-class MRU_MMU:
     def __init__(self):
-        self.real_memory = [None] * 100  # 100 pages in real memory
-        self.virtual_memory = {}
-        self.mru_list = []  # List to track the most recently used pages
-        self.ptr_page_map = {}
-        self.ptr_table = {}
+        self.demand = {}  # pid -> estimated frames the process needs
+        self.suspended = {}  # pid -> demand when suspended, oldest suspension first
+        self.idle = set()  # pids with no operations left to run; their pages compete but their demand does not count
+        self.suspensions = 0
+        self.resumptions = 0
+
+    def on_access(self, mmu, pid, page_id, fault):
+        pass
+
+    def on_free(self, mmu, pid, page_id):
+        pass
+
+    def on_kill(self, pid):
+        self.demand.pop(pid, None)
+        self.suspended.pop(pid, None)
+        self.idle.discard(pid)
+
+    def _active(self):
+        return {pid: demand for pid, demand in self.demand.items()
+                if pid not in self.suspended and pid not in self.idle}
+
+    def active_demand(self):
+        return sum(self._active().values())
+
+    def balance(self, mmu):
+        """ Suspend the process with the largest demand until the active processes fit in RAM """
+        active = self._active()
+        total = sum(active.values())
+        while total > mmu.config.frame_count and len(active) > 1:
+            pid = max(active, key=active.get)
+            total -= active.pop(pid)
+            self.suspend(mmu, pid)
+
+    def suspend(self, mmu, pid):
+        self.suspended[pid] = self.demand.get(pid, 0)
+        self.suspensions += 1
+        mmu.swap_out_process(pid)
+
+    def resume(self, mmu, pid):
+        del self.suspended[pid]
+        self.resumptions += 1
+
+    def ready_to_resume(self, mmu):
+        """ Suspended pids that fit in RAM again, in suspension order """
+        total = self.active_demand()
+        ready = []
+        for pid, demand in self.suspended.items():
+            if total + demand > mmu.config.frame_count:
+                break
+            total += demand
+            ready.append(pid)
+        return ready
+
+
+class WorkingSetController(LoadController):
+    """ Demand is the working set: distinct pages touched in the process' last tau references """
+
+    def __init__(self, tau=1000):
+        super().__init__()
+        self.tau = tau
+        self.virtual_time = {}  # pid -> references made by the process so far
+        self.last_reference = {}  # pid -> {page_id: virtual time of its last reference}
+        self.history = {}  # pid -> deque of (virtual time, page_id), oldest first
+
+    def on_access(self, mmu, pid, page_id, fault):
+        now = self.virtual_time[pid] = self.virtual_time.get(pid, 0) + 1
+        last_reference = self.last_reference.setdefault(pid, {})
+        history = self.history.setdefault(pid, deque())
+        if page_id not in last_reference:
+            self.demand[pid] = self.demand.get(pid, 0) + 1
+        last_reference[page_id] = now
+        history.append((now, page_id))
+        # Drop pages that fell out of the window
+        while history[0][0] <= now - self.tau:
+            then, old_page_id = history.popleft()
+            if last_reference.get(old_page_id) == then:
+                del last_reference[old_page_id]
+                self.demand[pid] -= 1
+
+    def on_free(self, mmu, pid, page_id):
+        if self.last_reference.get(pid, {}).pop(page_id, None) is not None:
+            self.demand[pid] -= 1
+
+    def on_kill(self, pid):
+        super().on_kill(pid)
+        self.virtual_time.pop(pid, None)
+        self.last_reference.pop(pid, None)
+        self.history.pop(pid, None)
+
+
+class PFFController(LoadController):
+    """ Page-fault frequency: grow a process that faults within threshold references, trim it otherwise """
+
+    def __init__(self, threshold=10, trim=True):
+        super().__init__()
+        self.threshold = threshold
+        self.trim = trim  # Evict pages not referenced since the last fault when a process faults rarely
+        self.virtual_time = {}  # pid -> references made by the process so far
+        self.last_fault = {}  # pid -> virtual time of its last fault
+        self.referenced = {}  # pid -> page ids referenced since its last fault
+
+    def on_access(self, mmu, pid, page_id, fault):
+        now = self.virtual_time[pid] = self.virtual_time.get(pid, 0) + 1
+        referenced = self.referenced.setdefault(pid, set())
+        if not fault:
+            referenced.add(page_id)
+            return
+        interval = now - self.last_fault.get(pid, 0)
+        self.last_fault[pid] = now
+        if interval > self.threshold:
+            if self.trim:
+                # The faulting page was just loaded; only pages untouched since the last fault go
+                mmu.swap_out_process(pid, keep=referenced | {page_id})
+            self.demand[pid] = len(referenced) + 1
+        else:
+            self.demand[pid] = self.demand.get(pid, 0) + 1
+        self.referenced[pid] = {page_id}
+
+    def on_free(self, mmu, pid, page_id):
+        referenced = self.referenced.get(pid)
+        if referenced is not None:
+            referenced.discard(page_id)
+        if self.demand.get(pid):
+            self.demand[pid] -= 1
+
+    def on_kill(self, pid):
+        super().on_kill(pid)
+        self.virtual_time.pop(pid, None)
+        self.last_fault.pop(pid, None)
+        self.referenced.pop(pid, None)
+
+
+class BaseMMU:
+    """ Page table, frame pool and swap handling shared by all replacement policies """
+
+    randomized = False  # Set by policies whose victims depend on the random seed
+
+    def __init__(self, config=None, event_log=None, prefetcher=None, controller=None, seed=None):
+        self.config = config or MachineConfig()
+        self.seed = seed
+        self.rng = random.Random(seed)  # Seeded runs are reproducible
+        self.real_memory = [None] * self.config.frame_count
+        self.virtual_memory = {}  # ptr_id -> {page_id: swapped out page}
+        self.ptr_page_map = {}  # page_id -> ptr_id
+        self.ptr_table = {}  # ptr_id -> (pid, page_ids)
+        self.process_ptrs = {}  # pid -> set of live ptr_ids
+        self.page_frames = {}  # page_id -> frame index, for pages currently in RAM
+        self.free_frames = []  # Frames released by delete/kill
+        self.next_free_frame = 0  # Frames at or past this index have never been used
+        self.frames_claimed = 0  # Frames handed out to new or swapped-in pages
+        self.frames_released = 0  # Frames returned to the free pool by delete/kill/swap_out_process
         self.logical_page_counter = 1
         self.disk_page_counter = 1
         self.ptr_id_counter = 1
         self.clock = 0
         self.thrashing_time = 0
+        self.page_hits = 0
+        self.page_faults = 0
+        self.writebacks = 0
+        self.clean_evictions = 0
+        self.zswap = None
+        if self.config.zswap_capacity:
+            self.zswap = CompressedTier(self.config.zswap_capacity, self.config.compression, self.config.page_size)
+        self.zswap_stores = 0
+        self.tier_faults = {'zswap': 0, 'disk': 0}  # Demand faults served by each backing tier
+        self.prefetcher = prefetcher  # Optional Prefetcher batching extra pages into each fault
+        self.prefetched_pages = 0
+        self.prefetch_hits = 0
+        self.controller = controller  # Optional LoadController suspending processes under overload
+        # Address translation; page ids double as virtual page numbers
+        self.tlb = None
+        if self.config.tlb_entries:
+            self.tlb = TLB(self.config.tlb_entries, self.config.tlb_ways, self.config.tlb_policy, self.rng)
+        self.page_table = None
+        if self.config.page_table_levels:
+            self.page_table = PageTable(self.config.page_table_levels, self.config.page_table_bits)
+        self.tlb_pid = None  # Last pid that used the TLB, for flushes without ASIDs
+        self.translation_time = 0
+        self.event_log = event_log  # Optional EventLog receiving every hit/fault/eviction
+        self.op_index = 0
+
+    # Replacement policy hooks
+    def _select_victim(self):
+        """ Return the frame index to evict when RAM is full """
+        raise NotImplementedError
+
+    def _on_load(self, index, page, swapped_in):
+        pass
+
+    def _on_hit(self, index, page):
+        pass
+
+    def _on_release(self, index):
+        pass
 
     def new(self, pid, size):
-        num_pages = (size + 4095) // 4096
+        self.op_index += 1
+        num_pages = self.config.pages_for(size)
         ptr_id = self.ptr_id_counter
         self.ptr_id_counter += 1
         page_ids = []
         for _ in range(num_pages):
-            logical_address = self.logical_page_counter
-            if None not in self.real_memory:
-                mru_index = self.mru_list.pop(0)  # Remove the most recently used page
-                self._evict_page(mru_index)
-                index = mru_index
-            else:
-                index = self.real_memory.index(None)
-
-            is_in_ram = True
-            physical_address = index
-            page = self._allocate_page(logical_address, is_in_ram, physical_address, None, pid)
+            index = self._get_frame()
+            page = Page(self.logical_page_counter, True, index, None, pid)
             page_ids.append(page.page_id)
-            self.real_memory[index] = page
-            self.mru_list.append(index)  # Add to MRU list
+            self._map_page(index, page)
             self.ptr_page_map[page.page_id] = ptr_id
+            self._on_load(index, page, False)
+            self._log_event(EVENT_ALLOC, page.page_id, index)
+            if self.controller is not None:
+                self.controller.on_access(self, pid, page.page_id, True)
             self.logical_page_counter += 1
 
         self.ptr_table[ptr_id] = (pid, page_ids)
+        self.process_ptrs.setdefault(pid, set()).add(ptr_id)
+        if self.controller is not None:
+            self.controller.balance(self)
         return ptr_id
 
-    def _evict_page(self, index):
-        evicted_page = self.real_memory[index]
-        if evicted_page:
-            old_ptr_id = self.ptr_page_map.get(evicted_page.page_id)
-            if old_ptr_id:
-                self.virtual_memory.setdefault(old_ptr_id, []).append({
-                    'page_id': evicted_page.page_id,
-                    'logical_address': evicted_page.logical_address,
-                    'physical_address': None,
-                    'disk_address': self.disk_page_counter,
-                    'pid': evicted_page.pid
-                })
-                self.disk_page_counter += 1
-            self.real_memory[index] = None
-            self.clock += 5  # Simulate disk access time
-            self.thrashing_time += 5  # Add to thrashing time
-
-    def _allocate_page(self, logical_address, is_in_ram, physical_address, disk_address, pid):
-        return Page(logical_address, is_in_ram, physical_address, disk_address, pid)
-
-    def use(self, ptr):
+    def use(self, ptr, write=False):
+        """ Access every page of ptr, marking them dirty when write is set """
+        self.op_index += 1
         if ptr in self.ptr_table:
-            _, page_ids = self.ptr_table[ptr]
+            pid, page_ids = self.ptr_table[ptr]
+            controller = self.controller
+            if controller is not None and pid in controller.suspended:
+                controller.resume(self, pid)
+            translate = self.tlb is not None or self.page_table is not None
+            if self.tlb is not None and not self.config.tlb_asid and pid != self.tlb_pid:
+                self.tlb.flush()  # Context switch without ASIDs
+            self.tlb_pid = pid
             for page_id in page_ids:
-                for index, page in enumerate(self.real_memory):
-                    if page and page.page_id == page_id:
-                        # Refresh the MRU list
-                        if index in self.mru_list:
-                            self.mru_list.remove(index)
-                        self.mru_list.append(index)
-                        self.clock += 1  # Add 1s to the clock for each hit
-                        break
+                index = self._translate(pid, page_id) if translate else self.page_frames.get(page_id)
+                fault = index is None
+                if not fault:
+                    page = self.real_memory[index]
+                    if write:
+                        page.dirty = True
+                    if page.prefetched:
+                        page.prefetched = False
+                        self.prefetch_hits += 1
+                    self.clock += self.config.hit_cost
+                    self.page_hits += 1
+                    self._on_hit(index, page)
+                    self._log_event(EVENT_HIT, page_id, index, None, self.config.hit_cost)
+                else:
+                    # Page needs to be swapped in from virtual memory
+                    self._swap_page_to_ram(page_id, write)
+                    if self.tlb is not None and page_id in self.page_frames:
+                        # The faulting access is retried and fills the TLB
+                        self.tlb.insert(self._asid(pid), page_id, self.page_frames[page_id])
+                if controller is not None:
+                    controller.on_access(self, pid, page_id, fault)
+            if self.prefetcher is not None:
+                read_ahead = self.prefetcher.on_use(self, ptr)
+                if read_ahead:
+                    self._read_pages(read_ahead)
+            if controller is not None:
+                controller.balance(self)
         else:
             print("Ptr not found in ptr table.")
 
     def delete(self, ptr):
-        if ptr in self.ptr_table:
-            _, page_ids = self.ptr_table.pop(ptr)
-            for index, page in enumerate(self.real_memory):
-                if page and page.page_id in page_ids:
-                    self.real_memory[index] = None
-                    if index in self.mru_list:
-                        self.mru_list.remove(index)
-            if ptr in self.virtual_memory:
-                del self.virtual_memory[ptr]
-            print(f"Deleted ptr {ptr} and its associated pages from memory.")
-        else:
-            print("Ptr not found in ptr table.")
+        self.op_index += 1
+        self._delete_ptr(ptr)
 
     def kill(self, pid):
-        to_delete = [ptr_id for ptr_id, (pid_val, _) in self.ptr_table.items() if pid_val == pid]
-        for ptr in to_delete:
-            self.delete(ptr)
+        self.op_index += 1
+        for ptr in list(self.process_ptrs.get(pid, ())):
+            self._delete_ptr(ptr)
+        if self.tlb is not None:
+            self.tlb.flush(self._asid(pid) if self.config.tlb_asid else None)
+        if self.page_table is not None:
+            self.page_table.drop(pid)
+        if self.controller is not None:
+            self.controller.on_kill(pid)
         print(f"All resources associated with PID {pid} have been successfully killed and freed.")
 
-class Random_MMU:
-    def __init__(self):
-        self.real_memory = [None] * 100  # 100 pages in real memory
-        self.virtual_memory = {}
-        self.ptr_page_map = {}
-        self.ptr_table = {}
-        self.logical_page_counter = 1
-        self.disk_page_counter = 1
-        self.ptr_id_counter = 1
-        self.clock = 0
-        self.thrashing_time = 0
-
-    def new(self, pid, size):
-        num_pages = (size + 4095) // 4096
-        ptr_id = self.ptr_id_counter
-        self.ptr_id_counter += 1
-        page_ids = []
-        for _ in range(num_pages):
-            logical_address = self.logical_page_counter
-            if None not in self.real_memory:
-                random_index = random.randint(0, 99)  # Randomly pick an index to replace
-                self._evict_page(random_index)
-                index = random_index
-            else:
-                index = self.real_memory.index(None)
-
-            is_in_ram = True
-            physical_address = index
-            page = self._allocate_page(logical_address, is_in_ram, physical_address, None, pid)
-            page_ids.append(page.page_id)
-            self.real_memory[index] = page
-            self.ptr_page_map[page.page_id] = ptr_id
-            self.logical_page_counter += 1
-
-        self.ptr_table[ptr_id] = (pid, page_ids)
-        return ptr_id
+    def _asid(self, pid):
+        return pid if self.config.tlb_asid else 0
+
+    def _translate(self, pid, page_id):
+        """ Find the frame of page_id through the TLB, walking the page table on a miss """
+        cost = 0
+        if self.tlb is not None:
+            cost += self.config.tlb_cost
+            index = self.tlb.lookup(self._asid(pid), page_id)
+            if index is not None:
+                self._charge_translation(page_id, index, cost)
+                return index
+        if self.page_table is not None:
+            index, levels = self.page_table.walk(pid, page_id)
+            cost += levels * self.config.walk_cost
+        else:
+            index = self.page_frames.get(page_id)
+        if index is not None and self.tlb is not None:
+            self.tlb.insert(self._asid(pid), page_id, index)
+        self._charge_translation(page_id, index, cost)
+        return index
+
+    def _charge_translation(self, page_id, index, cost):
+        if cost:
+            self.clock += cost
+            self.translation_time += cost
+            self._log_event(EVENT_TRANSLATE, page_id, index, None, cost)
+
+    def _map_page(self, index, page):
+        self.real_memory[index] = page
+        self.page_frames[page.page_id] = index
+        if self.page_table is not None:
+            self.page_table.map(page.pid, page.page_id, index)
+
+    def _unmap_page(self, index, page):
+        self.real_memory[index] = None
+        del self.page_frames[page.page_id]
+        if self.page_table is not None:
+            self.page_table.unmap(page.pid, page.page_id)
+        if self.tlb is not None:
+            self.tlb.invalidate(self._asid(page.pid), page.page_id)  # TLB shootdown
+
+    def _take_free_frame(self):
+        if self.free_frames:
+            return self.free_frames.pop()
+        if self.next_free_frame < self.config.frame_count:
+            self.next_free_frame += 1
+            return self.next_free_frame - 1
+        return None
+
+    def _get_frame(self):
+        """ Return a free frame index, evicting a page chosen by the policy if RAM is full """
+        self.frames_claimed += 1
+        index = self._take_free_frame()
+        if index is None:
+            index = self._select_victim()
+            self._evict_page(index)
+        return index
+
+    def _get_frames(self, count):
+        """ Free count frames in one pass: take free frames first, then evict victims back to back """
+        self.frames_claimed += count
+        frames = []
+        while len(frames) < count:
+            index = self._take_free_frame()
+            if index is None:
+                break
+            frames.append(index)
+        while len(frames) < count:
+            index = self._select_victim()
+            self._evict_page(index)
+            frames.append(index)
+        return frames
 
     def _evict_page(self, index):
         evicted_page = self.real_memory[index]
-        if evicted_page:
-            old_ptr_id = self.ptr_page_map.get(evicted_page.page_id)
-            if old_ptr_id:
-                self.virtual_memory.setdefault(old_ptr_id, []).append({
-                    'page_id': evicted_page.page_id,
-                    'logical_address': evicted_page.logical_address,
-                    'physical_address': None,
-                    'disk_address': self.disk_page_counter,
-                    'pid': evicted_page.pid
-                })
-                self.disk_page_counter += 1
-            self.real_memory[index] = None
-            self.clock += 5  # Simulate disk access time
-            self.thrashing_time += 5  # Add to thrashing time
-
-    def _allocate_page(self, logical_address, is_in_ram, physical_address, disk_address, pid):
-        return Page(logical_address, is_in_ram, physical_address, disk_address, pid)
-
-    def use(self, ptr):
+        page_id = evicted_page.page_id
+        ptr_id = self.ptr_page_map.get(page_id)
+        disk_address = evicted_page.disk_address
+        tier = 'disk'
+        spilled = None
+        if not evicted_page.needs_writeback():
+            cost = 0  # Clean page, the disk copy is still valid
+            self.clean_evictions += 1
+        else:
+            if self.zswap is not None:
+                spilled = self.zswap.store(page_id)
+            if spilled is not None:
+                tier = 'zswap'
+                cost = self.config.zswap_store_cost
+                self.zswap_stores += 1
+            else:
+                cost = self.config.writeback_cost
+                self.writebacks += 1
+                if disk_address is None:
+                    disk_address = self.disk_page_counter
+                    self.disk_page_counter += 1
+        self.virtual_memory.setdefault(ptr_id, {})[page_id] = {
+            'page_id': page_id,
+            'logical_address': evicted_page.logical_address,
+            'physical_address': None,
+            'disk_address': disk_address,
+            'pid': evicted_page.pid,
+            'tier': tier
+        }
+        self._unmap_page(index, evicted_page)
+        self._on_release(index)
+        self.clock += cost  # Simulate disk access time
+        self.thrashing_time += cost
+        self._log_event(EVENT_EVICT, page_id, index, disk_address, cost)
+        for spilled_id in spilled or ():
+            self._spill_to_disk(spilled_id)
+
+    def _spill_to_disk(self, page_id):
+        """ Write a page pushed out of the compressed tier to its disk slot """
+        entry = self.virtual_memory[self.ptr_page_map[page_id]][page_id]
+        if entry['disk_address'] is None:
+            entry['disk_address'] = self.disk_page_counter
+            self.disk_page_counter += 1
+        entry['tier'] = 'disk'
+        cost = self.config.writeback_cost
+        self.writebacks += 1
+        self.clock += cost
+        self.thrashing_time += cost
+        self._log_event(EVENT_ZSWAP_WRITEBACK, page_id, None, entry['disk_address'], cost)
+
+    def _swap_page_to_ram(self, page_id, write=False):
+        ptr_id = self.ptr_page_map.get(page_id)
+        if page_id not in self.virtual_memory.get(ptr_id, {}):
+            print(f"Error: Page {page_id} not found in virtual memory for swapping.")
+            return
+        extra = self.prefetcher.on_fault(self, ptr_id, page_id) if self.prefetcher is not None else []
+        self._read_pages([page_id] + extra, demand=True, write=write)
+
+    def _read_pages(self, page_ids, demand=False, write=False):
+        """ Read swapped-out pages as one batched I/O; the first page is the faulting one when demand is set """
+        entries = []
+        for page_id in page_ids[:self.config.frame_count]:
+            entry = self.virtual_memory.get(self.ptr_page_map.get(page_id), {}).pop(page_id, None)
+            if entry is not None:
+                if entry['tier'] == 'zswap':
+                    self.zswap.remove(page_id)
+                entries.append(entry)
+        if not entries:
+            return
+        frames = self._get_frames(len(entries))
+        disk_reads = 0
+        for position, (entry, index) in enumerate(zip(entries, frames)):
+            page_id = entry['page_id']
+            is_demand = demand and position == 0
+            in_zswap = entry['tier'] == 'zswap'
+            page = Page(entry['logical_address'], True, index, entry['disk_address'], entry['pid'], page_id=page_id)
+            # A page coming back from the compressed tier is newer than its disk copy, if it has one
+            page.dirty = in_zswap or (bool(write) and is_demand)
+            page.prefetched = not is_demand
+            self._map_page(index, page)
+            self._on_load(index, page, True)
+            if in_zswap:
+                cost = self.config.zswap_load_cost
+            else:
+                # The batch pays one full disk access, every further page only the prefetch cost
+                cost = self.config.fault_cost if disk_reads == 0 else self.config.prefetch_cost
+                disk_reads += 1
+            self.clock += cost  # Simulate disk access time for a swap
+            self.thrashing_time += cost
+            if is_demand:
+                self.page_faults += 1
+                self.tier_faults[entry['tier']] += 1
+                event_type = EVENT_ZSWAP_FAULT if in_zswap else EVENT_FAULT
+                self._log_event(event_type, page_id, index, entry['disk_address'], cost)
+            else:
+                self.prefetched_pages += 1
+                self._log_event(EVENT_PREFETCH, page_id, index, entry['disk_address'], cost)
+
+    def swap_out_process(self, pid, keep=()):
+        """ Evict every resident page of pid except those in keep, returning their frames to the free pool """
+        for ptr in self.process_ptrs.get(pid, ()):
+            for page_id in self.ptr_table[ptr][1]:
+                index = self.page_frames.get(page_id)
+                if index is not None and page_id not in keep:
+                    self._evict_page(index)
+                    self.free_frames.append(index)
+                    self.frames_released += 1
+
+    def swapped_pages(self, ptr):
+        """ Page ids of ptr currently swapped out, in allocation order """
+        if ptr not in self.ptr_table or ptr not in self.virtual_memory:
+            return []
+        swapped = self.virtual_memory[ptr]
+        return [page_id for page_id in self.ptr_table[ptr][1] if page_id in swapped]
+
+    def metrics_report(self):
+        """ Headline counters of the run so far, as plain numbers """
+        return {
+            'operations': self.op_index,
+            'clock': self.clock,
+            'thrashing_time': self.thrashing_time,
+            'page_hits': self.page_hits,
+            'page_faults': self.page_faults,
+            'writebacks': self.writebacks,
+            'clean_evictions': self.clean_evictions,
+            'zswap_stores': self.zswap_stores,
+            'prefetched_pages': self.prefetched_pages,
+            'prefetch_hits': self.prefetch_hits,
+            'translation_time': self.translation_time,
+            'resident_pages': len(self.page_frames),
+        }
+
+    def translation_report(self):
+        """ TLB hit rate and the clock time spent translating addresses """
+        report = {'translation_time': self.translation_time}
+        if self.tlb is not None:
+            lookups = self.tlb.hits + self.tlb.misses
+            report.update(tlb_hits=self.tlb.hits, tlb_misses=self.tlb.misses, tlb_flushes=self.tlb.flushes,
+                          tlb_hit_rate=self.tlb.hits / lookups if lookups else 0.0)
+        if self.page_table is not None:
+            report['page_table_nodes'] = self.page_table.nodes
+        return report
+
+    def tier_report(self):
+        """ Share of demand page accesses served by RAM, the compressed tier and disk """
+        accesses = self.page_hits + self.page_faults
+        report = {}
+        for tier, count in (('ram', self.page_hits), ('zswap', self.tier_faults['zswap']),
+                            ('disk', self.tier_faults['disk'])):
+            report[tier] = {'accesses': count, 'hit_rate': count / accesses if accesses else 0.0}
+        if self.zswap is not None:
+            report['zswap'].update(stored_pages=len(self.zswap), used_bytes=self.zswap.used,
+                                   capacity_bytes=self.zswap.capacity)
+        return report
+
+    def prefetch_report(self):
+        """ Accuracy: prefetched pages later used. Coverage: share of would-be faults avoided by prefetching """
+        demand_misses = self.page_faults + self.prefetch_hits
+        return {
+            'prefetched_pages': self.prefetched_pages,
+            'prefetch_hits': self.prefetch_hits,
+            'accuracy': self.prefetch_hits / self.prefetched_pages if self.prefetched_pages else 0.0,
+            'coverage': self.prefetch_hits / demand_misses if demand_misses else 0.0,
+        }
+
+    def _delete_ptr(self, ptr):
         if ptr in self.ptr_table:
-            _, page_ids = self.ptr_table[ptr]
+            pid, page_ids = self.ptr_table.pop(ptr)  # Remove the ptr entry and get associated page ids
+            ptrs = self.process_ptrs[pid]
+            ptrs.discard(ptr)
+            if not ptrs:
+                del self.process_ptrs[pid]
             for page_id in page_ids:
-                found = False
-                for index, page in enumerate(self.real_memory):
-                    if page and page.page_id == page_id:
-                        self.clock += 1  # Add 1s to the clock for each hit
-                        found = True
-                        break
-                if not found:
-                    random_index = random.randint(0, 99)  # Randomly pick an index to replace for swap-in
-                    self._evict_page(random_index)
-                    self._allocate_page_to_ram(page_id, random_index)
-        else:
-            print("Ptr not found in ptr table.")
+                if self.controller is not None:
+                    self.controller.on_free(self, pid, page_id)
+                self.ptr_page_map.pop(page_id, None)
+                index = self.page_frames.get(page_id)
+                if index is not None:
+                    self._unmap_page(index, self.real_memory[index])  # Free the page from real memory
+                    self._on_release(index)
+                    self.free_frames.append(index)
+                    self.frames_released += 1
+                    self._log_event(EVENT_FREE, page_id, index)
 
-    def _allocate_page_to_ram(self, page_id, index):
-        # Simulate fetching a page from virtual memory and placing it in real memory at the given index
-        self.real_memory[index] = Page(page_id, True, index, None)  # Assume creation of the page object
-        self.clock += 5
-        self.thrashing_time += 5
+            # Remove pages from virtual memory
+            for entry in self.virtual_memory.pop(ptr, {}).values():
+                if entry['tier'] == 'zswap':
+                    self.zswap.remove(entry['page_id'])
+                self._log_event(EVENT_FREE, entry['page_id'], None, entry['disk_address'])
 
-    def delete(self, ptr):
-        if ptr in self.ptr_table:
-            _, page_ids = self.ptr_table.pop(ptr)
-            for index, page in enumerate(self.real_memory):
-                if page and page.page_id in page_ids:
-                    self.real_memory[index] = None
-            if ptr in self.virtual_memory:
-                del self.virtual_memory[ptr]
             print(f"Deleted ptr {ptr} and its associated pages from memory.")
         else:
             print("Ptr not found in ptr table.")
 
-    def kill(self, pid):
-        to_delete = [ptr_id for ptr_id, (pid_val, _) in self.ptr_table.items() if pid_val == pid]
-        for ptr in to_delete:
-            self.delete(ptr)
-        print(f"All resources associated with PID {pid} have been successfully killed and freed.")
+    def _log_event(self, event_type, page_id, frame=None, disk_slot=None, clock_delta=0):
+        if self.event_log is not None:
+            self.event_log.record(self.op_index, event_type, page_id, frame, disk_slot, clock_delta)
 
-class SecondChance_MMU:
-    def __init__(self):
-        self.real_memory = [None] * 100
-        self.virtual_memory = {}
-        self.ptr_table = {}
-        self.ptr_page_map = {}
-        self.queue = []
-        self.disk_page_counter = 1
-        self.logical_page_counter = 1
-        self.ptr_id_counter = 1
-        self.clock = 0
-        self.thrashing_time = 0
+    def print_physical_memory_state(self):
+        print("Physical Memory State:")
+        for index, page in enumerate(self.real_memory):
+            if page:
+                ptr_id = self.ptr_page_map.get(page.page_id, "Unknown Pointer")
+                pid = self.ptr_table.get(ptr_id, ("Unknown PID", []))[0] if ptr_id != "Unknown Pointer" else "Unknown PID"
+                print(f"Index {index}: Page ID {page.page_id}, Logical Address {page.logical_address}, "
+                      f"Physical Address {index}, Reference Bit {page.reference_bit}, In RAM {page.is_in_ram}, "
+                      f"Ptr ID {ptr_id}, PID {pid}")
+            else:
+                print(f"Index {index}: Empty slot")
 
-    def new(self, pid, size):
-        num_pages = (size + 4095) // 4096
-        ptr_id = self.ptr_id_counter
-        self.ptr_id_counter += 1
-        page_ids = []
-        print(f"Starting new allocation: PID {pid}, size {size}, requiring {num_pages} pages.")
-        for _ in range(num_pages):
-            logical_address = self.logical_page_counter
-            print(f"Checking for available memory slot for page {self.logical_page_counter}...")
+    def print_virtual_memory(self):
+        print("Virtual Memory Content:")
+        for ptr_id, pages in self.virtual_memory.items():
+            for page in pages.values():
+                print(f"Ptr {ptr_id}: Page ID {page['page_id']}, Logical Address {page['logical_address']}, "
+                      f"Disk Address {page['disk_address']}, Tier {page['tier']}, PID {page['pid']}")
 
-            # Perform Second Chance algorithm if no free space is available
-            if None not in self.real_memory:
-                print("No free memory slots available. Initiating Second Chance algorithm...")
-                self.perform_second_chance()
+    def print_time(self):
+        print(f"Total time elapsed: {self.clock} seconds")
+        print(f"Total thrashing time: {self.thrashing_time} seconds")
 
-            index = self.real_memory.index(None) if None in self.real_memory else -1
-            if index == -1:
-                print("Critical Error: No memory available even after Second Chance processing.")
-                break  # This should be handled more gracefully in a real system.
 
-            # Allocate the new page
-            page = Page(logical_address, True, index, None, pid)
-            page_ids.append(page.page_id)
-            self.real_memory[index] = page
-            self.queue.append(index)
-            self.ptr_page_map[page.page_id] = ptr_id
+class OPT_MMU(BaseMMU):
+    def __init__(self, config=None, **kwargs):
+        if kwargs.get('controller') is not None:
+            # Future uses come from trace order, but load control defers ops by decisions made during the run
+            raise ValueError("OPT_MMU cannot run under a load controller")
+        super().__init__(config, **kwargs)
+        self.future_uses = {}  # ptr_id -> deque of op indexes at which the ptr will be used
+        self.next_use_heap = []  # (-next use, counter, frame index, page_id); stale entries are skipped lazily
+        self.heap_counter = 0
+        self.current_ptr = None  # Ptr being served by use(), its pages are never evicted mid-operation
 
-            print(f"Allocated page {page.page_id} at memory index {index}. Queue updated.")
-            self.logical_page_counter += 1
+    def precalculate_future_uses(self, operations):
+        """ Precalculate future uses for all ptrs from the upcoming (command, args) operations """
+        future_accesses = {}
+        for op_index, (command, args) in enumerate(operations, start=self.op_index + 1):
+            if command == 'use':
+                future_accesses.setdefault(args[0], deque()).append(op_index)
+        self.future_uses = future_accesses
+        self._rebuild_heap()
+
+    def _next_use(self, ptr_id):
+        uses = self.future_uses.get(ptr_id)
+        while uses and uses[0] <= self.op_index:
+            uses.popleft()
+        return uses[0] if uses else float('inf')
+
+    def _push_page(self, index, page_id):
+        if len(self.next_use_heap) > 4 * len(self.page_frames) + 64:
+            # Drop stale entries here rather than on eviction, so runs that never evict stay bounded too
+            self._rebuild_heap()
+            if self.page_frames.get(page_id) == index:
+                return
+        self.heap_counter += 1
+        next_use = self._next_use(self.ptr_page_map.get(page_id))
+        heapq.heappush(self.next_use_heap, (-next_use, self.heap_counter, index, page_id))
+
+    def _rebuild_heap(self):
+        self.next_use_heap = []
+        for page_id, index in self.page_frames.items():
+            self._push_page(index, page_id)
+
+    def _select_victim(self):
+        """ Evict the page whose ptr is used furthest in the future (or never again) """
+        protected = {}  # page_id -> heap entry of a current ptr page set aside
+        victim = None
+        while self.next_use_heap:
+            neg_next_use, _, index, page_id = self.next_use_heap[0]
+            page = self.real_memory[index]
+            if page is None or page.page_id != page_id:
+                heapq.heappop(self.next_use_heap)
+                continue
+            ptr_id = self.ptr_page_map.get(page_id)
+            if -neg_next_use != self._next_use(ptr_id):
+                heapq.heappop(self.next_use_heap)
+                self._push_page(index, page_id)
+                continue
+            if ptr_id == self.current_ptr and len(protected) < len(self.page_frames) - 1:
+                entry = heapq.heappop(self.next_use_heap)
+                protected.setdefault(page_id, entry)
+                continue
+            victim = index
+            break
+        for entry in protected.values():
+            heapq.heappush(self.next_use_heap, entry)
+        if victim is None:
+            self._rebuild_heap()
+            victim = self.next_use_heap[0][2]
+        return victim
+
+    def _on_load(self, index, page, swapped_in):
+        self._push_page(index, page.page_id)
+
+    def _on_hit(self, index, page):
+        self._push_page(index, page.page_id)
+
+    def use(self, ptr, write=False):
+        self.current_ptr = ptr
+        super().use(ptr, write)
+        self.current_ptr = None
+
+
+class MRU_MMU(BaseMMU):
+    def __init__(self, config=None, **kwargs):
+        super().__init__(config, **kwargs)
+        self.mru_list = FrameList(self.config.frame_count)  # Frames ordered from least to most recently used
+
+    def _select_victim(self):
+        return self.mru_list.last()  # Evict the most recently used page
+
+    def _on_load(self, index, page, swapped_in):
+        self.mru_list.append(index)
+
+    def _on_hit(self, index, page):
+        self.mru_list.move_to_end(index)
+
+    def _on_release(self, index):
+        self.mru_list.discard(index)
+
+
+class Random_MMU(BaseMMU):
+    randomized = True
+
+    def _select_victim(self):
+        while True:
+            index = self.rng.randrange(self.config.frame_count)
+            if self.real_memory[index] is not None:  # Frames freed earlier in a batch are skipped
+                return index
 
-        self.ptr_table[ptr_id] = (pid, page_ids)
-        print(f"Allocation complete. Ptr {ptr_id} assigned to PID {pid} with pages {page_ids}.")
-        return ptr_id
 
+class SecondChance_MMU(BaseMMU):
+    def __init__(self, config=None, **kwargs):
+        super().__init__(config, **kwargs)
+        self.queue = FrameList(self.config.frame_count)
+
+    def _select_victim(self):
+        return self.perform_second_chance()
 
     def perform_second_chance(self):
         while True:
-            oldest_index = self.queue.pop(0)
+            oldest_index = self.queue.first()
             oldest_page = self.real_memory[oldest_index]
             if oldest_page.reference_bit == 0:
-                self.evict_page(oldest_page, oldest_index)
-                break
+                return oldest_index
             oldest_page.reference_bit = 0
-            self.queue.append(oldest_index)
-
-    def evict_page(self, page, index):
-        old_ptr_id = self.ptr_page_map.get(page.page_id)
-        if old_ptr_id:
-            pid = self.ptr_table[old_ptr_id][0]
-            self.virtual_memory.setdefault(old_ptr_id, []).append({
-                'page_id': page.page_id,
-                'logical_address': page.logical_address,
-                'physical_address': None,
-                'disk_address': self.disk_page_counter,
-                'pid': pid
-            })
-            self.disk_page_counter += 1
-        self.real_memory[index] = None
-        print(f"Evicting page {page.page_id} from index {index}.")
+            self.queue.move_to_end(oldest_index)
 
-    
-    
-
-    def use(self, ptr):
-        if ptr in self.ptr_table:
-            _, page_ids = self.ptr_table[ptr]
-            print(f"Using ptr {ptr} with pages {page_ids}.")
-            for page_id in page_ids:
-                found_in_ram = False
-                for index, page in enumerate(self.real_memory):
-                    if page is not None and page.page_id == page_id:
-                        found_in_ram = True
-                        # Mark the page as recently used
-                        page.reference_bit = 1
-                        print(f"Page {page_id} is already in RAM. Setting reference bit.")
-                        self.clock += 1  # Increment clock for each hit
-                        break
-                if not found_in_ram:
-                    # Page is in virtual memory, need to swap it in
-                    print(f"Page {page_id} is not in RAM, swapping from disk using Second Chance.")
-                    self.clock += 5  # Increment clock for each miss
-                    self.thrashing_time += 5  # Increment thrashing time
-                    self._swap_page_to_ram(page_id)
-        else:
-            print("Ptr not found in ptr table.")
-
-    def _swap_page_to_ram(self, page_id):
-        print(f"Attempting to swap page {page_id} into RAM.")
-        if None in self.real_memory:
-            index = self.real_memory.index(None)
-        else:
-            # Apply Second Chance algorithm to find a page to evict
-            self.perform_second_chance()
-            index = self.queue.pop(0)  # Assume the page at the head of the queue is evictable now
-            evicted_page = self.real_memory[index]
-            print(f"No free space in real memory. Evicting page {evicted_page.page_id} from index {index}.")
-            self.evict_page(evicted_page, index)
-
-        # After space is made, place the new page in RAM
-        found_page = False
-        for ptr_id, pages in self.virtual_memory.items():
-            for page in pages:
-                if page['page_id'] == page_id:
-                    # Use the existing page_id to maintain consistency
-                    page_in_ram = Page(page['logical_address'], True, index, None, page.get('pid', None))
-                    page_in_ram.page_id = page_id  # Ensure the original page ID is retained
-                    self.real_memory[index] = page_in_ram
-                    self.queue.append(index)  # Add to the end of the queue with the reference bit set
-                    page_in_ram.reference_bit = 1  # Set the reference bit when the page is brought into RAM
-                    pages.remove(page)
-                    self.ptr_page_map[page_id] = ptr_id
-                    print(f"Swapped page {page_id} into RAM at index {index}. Page details: {page_in_ram.__dict__}")
-                    found_page = True
-                    break
-            if found_page:
-                break
-
-        if not found_page:
-            print(f"Error: Page {page_id} not found in virtual memory for swapping.")
+    def _on_load(self, index, page, swapped_in):
+        # Set the reference bit when the page is brought into RAM on demand
+        page.reference_bit = 1 if swapped_in and not page.prefetched else 0
+        self.queue.append(index)
 
+    def _on_hit(self, index, page):
+        page.reference_bit = 1  # Mark the page as recently used
 
+    def _on_release(self, index):
+        self.queue.discard(index)
 
     def print_fifo_queue(self):
         print("FIFO Queue Content:")
         for index in self.queue:
             page = self.real_memory[index]
-            if page:
-                print(f"Index {index}: Page ID {page.page_id}, Logical Address {page.logical_address}, Reference Bit {page.reference_bit}, In RAM {page.is_in_ram}")
-            else:
-                print(f"Index {index}: Empty slot")
+            print(f"Index {index}: Page ID {page.page_id}, Logical Address {page.logical_address}, Reference Bit {page.reference_bit}, In RAM {page.is_in_ram}")
 
-    def print_physical_memory_state(self):
-        print("Physical Memory State:")
-        for index, page in enumerate(self.real_memory):
-            if page:
-                # Retrieve the ptr_id and pid associated with the page
-                ptr_id = self.ptr_page_map.get(page.page_id, "Unknown Pointer")
-                pid = self.ptr_table.get(ptr_id, ("Unknown PID", []))[0] if ptr_id != "Unknown Pointer" else "Unknown PID"
-                
-                # Print detailed information about each page
-                print(f"Index {index}: Page ID {page.page_id}, Logical Address {page.logical_address}, "
-                    f"Physical Address {index}, Reference Bit {page.reference_bit}, In RAM {page.is_in_ram}, "
-                    f"Ptr ID {ptr_id}, PID {pid}")
-            else:
-                print(f"Index {index}: Empty slot")
 
+class FIFO_MMU(BaseMMU):
+    def __init__(self, config=None, **kwargs):
+        super().__init__(config, **kwargs)
+        self.queue = FrameList(self.config.frame_count)
 
-    def print_virtual_memory(self):
-        print("Virtual Memory Content:")
-        for ptr_id, pages in self.virtual_memory.items():
-            for page in pages:
-                print(f"Ptr {ptr_id}: Page ID {page['page_id']}, Logical Address {page['logical_address']}, Disk Address {page['disk_address']}, PID {page['pid']}")
+    def _select_victim(self):
+        return self.queue.first()
 
-class FIFO_MMU:
-    def __init__(self):
-        self.real_memory = [None] * 100
-        self.virtual_memory = {}
-        self.ptr_table = {}
-        self.ptr_page_map = {}
-        self.queue = []
-        self.disk_page_counter = 1
-        self.logical_page_counter = 1
-        self.ptr_id_counter = 1
-        self.clock = 0  
-        self.thrashing_time = 0  
+    def _on_load(self, index, page, swapped_in):
+        self.queue.append(index)  # Add to the end of the FIFO queue
 
-    def new(self, pid, size):
-        num_pages = (size + 4095) // 4096
-        ptr_id = self.ptr_id_counter
-        self.ptr_id_counter += 1
-        page_ids = []
-        print(f"Starting new allocation: PID {pid}, size {size}, requiring {num_pages} pages.")
-        for _ in range(num_pages):
-            logical_address = self.logical_page_counter
-            print(f"Allocating page {self.logical_page_counter} at logical address {logical_address}.")
-            if None not in self.real_memory:
-                oldest_page_index = self.queue.pop(0)
-                oldest_page = self.real_memory[oldest_page_index]
-                old_ptr_id = self.ptr_page_map[oldest_page.page_id]
-                pid_old = self.ptr_table[old_ptr_id][0]  # Retrieve the PID associated with the oldest page
-                print(f"No free space in real memory. Evicting page {oldest_page.page_id} from index {oldest_page_index}.")
-                self.virtual_memory.setdefault(old_ptr_id, []).append({
-                    'page_id': oldest_page.page_id,
-                    'logical_address': oldest_page.logical_address,
-                    'physical_address': None,
-                    'disk_address': self.disk_page_counter,
-                    'pid': pid_old  # Store PID along with other page details
-                })
-                self.disk_page_counter += 1
-                self.real_memory[oldest_page_index] = None
-                self.clock += 5  # Sumar 5 segundos por fallo
-                self.thrashing_time += 5  # Sumar al tiempo de thrashing
-                index = oldest_page_index
-            else:
-                index = self.real_memory.index(None)
-                self.clock += 1
-                print(f"Found free space in real memory at index {index}.")
+    def _on_hit(self, index, page):
+        self.queue.move_to_end(index)  # Move this page's index to the end of the FIFO queue
 
-            is_in_ram = index != -1
-            physical_address = index if is_in_ram else None
-            disk_address = None if is_in_ram else self.disk_page_counter
-            if not is_in_ram:
-                self.disk_page_counter += 1
+    def _on_release(self, index):
+        self.queue.discard(index)
 
-            page = self._allocate_page(logical_address, is_in_ram, physical_address, disk_address, pid)
-            page_ids.append(page.page_id)
-            self.real_memory[index] = page
-            self.queue.append(index)
-            self.ptr_page_map[page.page_id] = ptr_id
-            print(f"Page {page.page_id} added to real memory at index {index}. Now in RAM: {is_in_ram}")
+    def print_fifo_queue(self):
+        print("FIFO Queue Content:")
+        for index in self.queue:
+            page = self.real_memory[index]
+            print(f"Index {index} in real memory: Page ID {page.page_id}, Logical Address {page.logical_address}, In RAM {page.is_in_ram}")
 
-            self.logical_page_counter += 1
 
-        self.ptr_table[ptr_id] = (pid, page_ids)
-        print(f"Allocation complete. Ptr {ptr_id} assigned to PID {pid} with pages {page_ids}.")
-        return ptr_id
+class EnhancedClock_MMU(SecondChance_MMU):
+    """ Second Chance that prefers evicting clean pages, using the (R, M) bit classes """
 
-    def use(self, ptr):
-        if ptr in self.ptr_table:
-            _, page_ids = self.ptr_table[ptr]
-            print(f"Using ptr {ptr} with pages {page_ids}.")
-            for page_id in page_ids:
-                found_in_ram = False
-                for index, page in enumerate(self.real_memory):
-                    if page is not None and page.page_id == page_id:
-                        found_in_ram = True
-                        # Move this page's index to the end of the FIFO queue
-                        if index in self.queue:
-                            self.queue.remove(index)
-                        self.queue.append(index)
-                        print(f"Page {page_id} is already in RAM and has been refreshed in the FIFO queue.")
-                        self.clock += 1  # Sumar 1s al reloj por cada hit
-                        break
-                if not found_in_ram:
-                    # Page is in virtual memory, need to swap it in
-                    print(f"Page {page_id} is not in RAM, swapping from disk.")
-                    self.clock += 5  # Sumar 5s al reloj por cada fallo
-                    self.thrashing_time += 5  # Sumar al tiempo de thrashing
-                    self._swap_page_to_ram(page_id)
-        else:
-            print("Ptr not found in ptr table.")
+    def __init__(self, config=None, **kwargs):
+        super().__init__(config, **kwargs)
+        self.clean = FrameList(self.config.frame_count)  # Frames neither referenced nor modified, class (0, 0)
 
-    def _swap_page_to_ram(self, page_id):
-        print(f"Attempting to swap page {page_id} into RAM.")
-        if None in self.real_memory:
-            index = self.real_memory.index(None)
+    def _sync_clean(self, index, page):
+        if page.reference_bit == 0 and not page.needs_writeback():
+            if index not in self.clean:
+                self.clean.append(index)
         else:
-            index = self.queue.pop(0)
-            evicted_page = self.real_memory[index]
-            print(f"No free space in real memory. Evicting page {evicted_page.page_id} from index {index}.")
-            old_ptr_id = self.ptr_page_map.get(evicted_page.page_id)
-            if old_ptr_id is not None:
-                pid = self.ptr_table[old_ptr_id][0]
-
-                self.virtual_memory.setdefault(old_ptr_id, []).append({
-                    'page_id': evicted_page.page_id,
-                    'logical_address': evicted_page.logical_address,
-                    'physical_address': None,
-                    'disk_address': self.disk_page_counter,
-                    'pid': pid 
-
-                })
-                self.disk_page_counter += 1
-            self.real_memory[index] = None
-
-        found_page = False
-        for ptr_id, pages in self.virtual_memory.items():
-            for page in pages:
-                if page['page_id'] == page_id:
-                    # Use the existing page_id to maintain consistency
-                    pid = page.get('pid', None)
-                    page_in_ram = Page(page['logical_address'], True, index, None)
-                    page_in_ram.page_id = page_id  # Ensure the original page ID is retained
-                    self.real_memory[index] = page_in_ram
-                    self.queue.append(index)  # Add to the end of the FIFO queue
-                    pages.remove(page)
-                    self.ptr_page_map[page_id] = ptr_id
-                    print(f"Swapped page {page_id} into RAM at index {index}. Page details: {page_in_ram.__dict__}")
-                    found_page = True
-                    break
-            if found_page:
-                break
+            self.clean.discard(index)
 
-        if not found_page:
-            print(f"Error: Page {page_id} not found in virtual memory for swapping.")
+    def _select_victim(self):
+        # Pass 1: a page that is neither referenced nor modified, kept in its own list so this is O(1)
+        index = self.clean.first()
+        if index is not None:
+            return index
+        while True:
+            # Pass 2: accept a modified page, clearing reference bits along the way
+            for _ in range(len(self.queue)):
+                index = self.queue.first()
+                page = self.real_memory[index]
+                if page.reference_bit == 0:
+                    return index
+                page.reference_bit = 0
+                self._sync_clean(index, page)
+                self.queue.move_to_end(index)
+            index = self.clean.first()
+            if index is not None:
+                return index
 
-    def delete(self, ptr):
-        if ptr in self.ptr_table:
-            _, page_ids = self.ptr_table.pop(ptr)
-            print(f"Deleting ptr {ptr} with pages {page_ids}.")
-            updated_real_memory = []
-            for index, page in enumerate(self.real_memory):
-                if page is None or page.page_id not in page_ids:
-                    updated_real_memory.append(page)
-                else:
-                    updated_real_memory.append(None)
-                    if index in self.queue:
-                        self.queue.remove(index)
-            self.real_memory = updated_real_memory
-
-            if ptr in self.virtual_memory:
-                del self.virtual_memory[ptr]
-            print(f"All pages for ptr {ptr} removed from memory. Ptr table entry removed.")
-        else:
-            print("Ptr not found in ptr table.")
+    def _on_load(self, index, page, swapped_in):
+        super()._on_load(index, page, swapped_in)
+        self._sync_clean(index, page)
 
-    def kill(self, pid):
-        # Primero, buscar todos los ptrs asociados con este pid y eliminarlos
-        ptrs_to_delete = [ptr_id for ptr_id, (pid_val, _) in self.ptr_table.items() if pid_val == pid]
-        for ptr_id in ptrs_to_delete:
-            self.delete(ptr_id)
-            
-        # Asegurarse de que tambiÃ©n se eliminan de la memoria virtual
-        for ptr_id in list(self.virtual_memory.keys()):
-            if ptr_id in ptrs_to_delete:
-                del self.virtual_memory[ptr_id]
-
-        # Finalmente, remover cualquier pÃ¡gina que pueda estar en la memoria real pero que no se limpiÃ³ completamente
-        self.real_memory = [None if (page and self.ptr_page_map.get(page.page_id) in ptrs_to_delete) else page for page in self.real_memory]
-
-        # Limpiar la cola FIFO para las pÃ¡ginas que ya no son vÃ¡lidas
-        self.queue = [index for index in self.queue if self.real_memory[index] and self.ptr_page_map.get(self.real_memory[index].page_id) not in ptrs_to_delete]
-        
-        print(f"All resources associated with PID {pid} have been successfully killed and freed.")
+    def _on_hit(self, index, page):
+        super()._on_hit(index, page)
+        self.clean.discard(index)
 
+    def _on_release(self, index):
+        super()._on_release(index)
+        self.clean.discard(index)
 
-    def _allocate_page(self, logical_address, is_in_ram, physical_address, disk_address, pid):
-        # The method now takes an additional 'pid' parameter and passes it to the Page constructor
-        return Page(logical_address, is_in_ram, physical_address, disk_address, pid)
 
+class NRU_MMU(BaseMMU):
+    """ Not Recently Used: evict from the lowest (R, M) class, clearing R bits every reset_interval ops """
 
-    def print_virtual_memory(self):
-        print("Virtual Memory Content:")
-        for ptr_id, pages in self.virtual_memory.items():
-            for page in pages:
-                # Fetching PID from each page information
-                pid = page.get('pid', 'Unknown PID')
-                print(f"Ptr {ptr_id}: Page ID {page['page_id']}, Physical Address: {page['physical_address']}, Disk Address: {page['disk_address']}, PID: {pid}")
+    def __init__(self, config=None, reset_interval=100, **kwargs):
+        super().__init__(config, **kwargs)
+        self.reset_interval = reset_interval
+        self.last_reset = 0  # op_index of the last R bit reset
+        self.classes = FrameList.group(self.config.frame_count, 4)  # Class = 2 * R + M; a frame is in one class
+        self.page_class = array('b', [-1]) * self.config.frame_count
 
+    def _page_class(self, page):
+        return 2 * page.reference_bit + page.needs_writeback()
 
-    def print_fifo_queue(self):
-        print("FIFO Queue Content:")
-        for index in self.queue:
-            page = self.real_memory[index]
-            if page:
-                print(f"Index {index} in real memory: Page ID {page.page_id}, Logical Address {page.logical_address}, In RAM {page.is_in_ram}")
-            else:
-                print(f"Index {index} in real memory: Empty slot")
+    def _set_class(self, index, page):
+        new_class = self._page_class(page)
+        old_class = self.page_class[index]
+        if new_class != old_class:
+            if old_class != -1:
+                self.classes[old_class].discard(index)
+            self.classes[new_class].append(index)
+            self.page_class[index] = new_class
 
-    def print_physical_memory_state(self):
-        print("Physical Memory State:")
-        for index, page in enumerate(self.real_memory):
-            if page:
-                ptr_id = self.ptr_page_map.get(page.page_id, "Unknown Pointer")
-                pid = self.ptr_table.get(ptr_id, ("Unknown PID", []))[0] if ptr_id != "Unknown Pointer" else "Unknown PID"
-                print(f"Index {index}: Page ID {page.page_id}, Logical Address {page.logical_address}, Physical Address {index}, In RAM {page.is_in_ram}, Belongs to PID {pid}, Ptr {ptr_id}")
-            else:
-                print(f"Index {index}: Empty slot")
+    def _select_victim(self):
+        for frames in self.classes:
+            if frames:
+                return frames.first()
 
+    def _on_load(self, index, page, swapped_in):
+        page.reference_bit = 0 if page.prefetched else 1
+        self._set_class(index, page)
 
-    def print_time(self):
-        print(f"Total time elapsed: {self.clock} seconds")
-        print(f"Total thrashing time: {self.thrashing_time} seconds")
+    def _on_hit(self, index, page):
+        page.reference_bit = 1
+        self._set_class(index, page)
+
+    def _on_release(self, index):
+        self.classes[self.page_class[index]].discard(index)
+        self.page_class[index] = -1
+
+    def new(self, pid, size):
+        self._tick()
+        return super().new(pid, size)
+
+    def use(self, ptr, write=False):
+        self._tick()
+        super().use(ptr, write)
+
+    def _tick(self):
+        # Counted from the last reset, so delete/kill ops landing on the interval cannot skip it
+        if self.op_index - self.last_reset >= self.reset_interval:
+            self.reset_reference_bits()
+            self.last_reset = self.op_index
+
+    def reset_reference_bits(self):
+        """ Clock tick: clear R on every page, moving classes 2/3 down to 0/1 """
+        for referenced_class in (2, 3):
+            frames = self.classes[referenced_class]
+            while frames:
+                index = frames.first()
+                page = self.real_memory[index]
+                page.reference_bit = 0
+                self._set_class(index, page)
+
+
+# Algorithm registry: name -> MMU class, or a 'module:Class' path imported the first time it is selected
+ALGORITHMS = {
+    'OPT': OPT_MMU,
+    'MRU': MRU_MMU,
+    'Random': Random_MMU,
+    'FIFO': FIFO_MMU,
+    'SecondChance': SecondChance_MMU,
+    'EnhancedClock': EnhancedClock_MMU,
+    'NRU': NRU_MMU,
+}
+
+
+def register_algorithm(name, target):
+    """ Make a policy selectable by name; target is an MMU class or a 'module:Class' path """
+    ALGORITHMS[name] = target
+
+
+def get_algorithm(name):
+    """ MMU class registered as name, importing it on first use """
+    target = ALGORITHMS[name]
+    if isinstance(target, str):
+        module_name, _, class_name = target.partition(':')
+        target = ALGORITHMS[name] = getattr(importlib.import_module(module_name), class_name)
+    return target
+
+
+def create_mmu(name, config=None, **kwargs):
+    return get_algorithm(name)(config, **kwargs)
+
+
+OPERATION_PATTERN = r"(\w+)\(([\d,\s]+)\)"
+TRACE_COMMANDS = frozenset(('new', 'use', 'delete', 'kill'))  # The only MMU methods a trace may call
+
+
+def parse_operations(lines):
+    """ Parse trace lines such as new(1, 500) or use(3) into (command, args) tuples """
+    import re  # Only needed once there is a trace to parse, and slow to import at startup
+    findall = re.compile(OPERATION_PATTERN).findall
+    operations = []
+    for line_number, line in enumerate(lines, start=1):
+        parts = findall(line.strip())
+        if parts:
+            command, args_str = parts[0]
+            if command not in TRACE_COMMANDS:
+                raise ValueError(f"Unknown trace command {command} on line {line_number}")
+            operations.append((command, [int(x.strip()) for x in args_str.split(',')]))
+    return operations
+
+
+def read_operations(path):
+    with open(path, "r") as file:
+        return parse_operations(file)
+
+
+def tag_operations(operations, first_ptr=1):
+    """ Tag each (command, args) operation with its pid and, for new(), the ptr number the trace expects """
+    # Trace ptr numbers follow the order of its new() calls, which reordering operations can change
+    trace_ptr = first_ptr - 1
+    ptr_pids = {}
+    tagged = []
+    for command, args in operations:
+        if command == 'new':
+            trace_ptr += 1
+            ptr_pids[trace_ptr] = args[0]
+            tagged.append((args[0], command, args, trace_ptr))
+        elif command == 'kill':
+            tagged.append((args[0], command, args, None))
+        else:
+            tagged.append((ptr_pids.get(args[0]), command, args, None))
+    return tagged
+
+
+def trace_method(mmu, command):
+    """ Bound MMU method for a trace command, refusing anything but new/use/delete/kill """
+    if command not in TRACE_COMMANDS:
+        raise ValueError(f"Unknown trace command {command}")
+    return getattr(mmu, command)
+
+
+def execute_operation(mmu, ptr_ids, command, args, trace_ptr):
+    """ Run one tagged operation, translating trace ptr numbers through ptr_ids """
+    if command == 'new':
+        ptr_ids[trace_ptr] = mmu.new(*args)
+    elif command == 'kill':
+        mmu.kill(*args)
+    else:
+        trace_method(mmu, command)(ptr_ids.get(args[0], args[0]), *args[1:])
+
+
+def run_operations(mmu, operations, on_step=None):
+    """ Run (command, args) operations on mmu; with a load controller, ops of suspended processes wait for resume
+
+    on_step(mmu, step) is called after each trace operation has been handled, step counting from 1.
+    """
+    controller = mmu.controller
+    if controller is None:
+        for step, (command, args) in enumerate(operations, start=1):
+            trace_method(mmu, command)(*args)
+            if on_step is not None:
+                on_step(mmu, step)
+        return mmu
+
+    tagged = tag_operations(operations, mmu.ptr_id_counter)
+    ptr_ids = {}
+    deferred = {}  # pid -> deque of operations waiting for the process to be resumed
+    remaining = {}  # pid -> operations of the trace not run yet
+    for pid, _, _, _ in tagged:
+        remaining[pid] = remaining.get(pid, 0) + 1
+
+    def execute(pid, command, args, trace_ptr):
+        execute_operation(mmu, ptr_ids, command, args, trace_ptr)
+        remaining[pid] -= 1
+        if not remaining[pid] and command != 'kill':
+            # Finished processes must not keep the ones with work left suspended
+            controller.idle.add(pid)
+
+    def drain(pid):
+        queue = deferred[pid]
+        while queue and pid not in controller.suspended:
+            execute(pid, *queue.popleft())
+        if not queue:
+            del deferred[pid]
+
+    def resume_ready():
+        for pid in controller.ready_to_resume(mmu):
+            controller.resume(mmu, pid)
+            if pid in deferred:
+                drain(pid)
+
+    for step, (pid, command, args, trace_ptr) in enumerate(tagged, start=1):
+        if pid in controller.suspended or pid in deferred:
+            deferred.setdefault(pid, deque()).append((command, args, trace_ptr))
+        else:
+            execute(pid, command, args, trace_ptr)
+        resume_ready()
+        if on_step is not None:
+            on_step(mmu, step)
+
+    # End of trace: resume whatever is still waiting, oldest suspension first
+    while deferred:
+        pid = next((waiting for waiting in controller.suspended if waiting in deferred), next(iter(deferred)))
+        if pid in controller.suspended:
+            controller.resume(mmu, pid)
+        drain(pid)
+        resume_ready()
+    return mmu
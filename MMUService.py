@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from MMU import ALGORITHMS, MachineConfig, get_algorithm, parse_operations
+from ResultCache import DEFAULT_CACHE_DIR, ResultCache, cacheable, simulate, trace_digest
+
+MAX_LINE = 64 << 20  # Biggest request line accepted, traces are uploaded inline
+
+
+def run_job(operations, algorithm, config, seed=None, progress_every=0, progress=None):
+    """ Run one trace in a worker process and return its result entry; every progress_every
+    steps a (step, total, metrics) tuple is put on the progress queue """
+    on_step = None
+    if progress is not None:
+        def on_step(step, total, metrics):
+            progress.put((step, total, metrics))
+
+    try:
+        # The MMUs print every delete/kill; keep worker output quiet
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            return simulate(operations, get_algorithm(algorithm), MachineConfig(**config), seed, progress_every, on_step)
+    finally:
+        if progress is not None:
+            progress.put(None)
+
+
+class SharedRun:
+    """ A simulation in flight; every request for it follows the same progress and result """
+
+    def __init__(self, progress_every):
+        self.progress_every = progress_every
+        self.events = []  # Progress events so far, replayed to requests that join late
+        self.finished = False
+        self.entry = None
+        self.error = None
+        self.update = asyncio.Event()  # Set, then replaced, whenever an event or the result arrives
+        self.task = None
+
+    def publish(self, event):
+        self.events.append(event)
+        self._notify()
+
+    def finish(self, entry=None, error=None):
+        self.entry = entry
+        self.error = error
+        self.finished = True
+        self._notify()
+
+    def _notify(self):
+        self.update.set()
+        self.update = asyncio.Event()
+
+    async def follow(self, send, progress=True):
+        """ Send the progress so far and to come (when progress is set), then return the result entry """
+        sent = 0 if progress else None
+        while True:
+            update = self.update
+            while sent is not None and sent < len(self.events):
+                await send(dict(self.events[sent]))
+                sent += 1
+            if self.finished:
+                break
+            await update.wait()
+        if self.error is not None:
+            raise self.error
+        return self.entry
+
+
+class SimulationService:
+    """ Line-delimited JSON simulation server running traces on a process pool
+
+    Each request is one JSON object per line:
+        {"id": 1, "algorithm": "FIFO", "trace": "new(1, 500)\\nuse(1)\\n...", "config": {"frame_count": 50},
+         "seed": 0, "progress_every": 100}
+    "path" may be given instead of "trace" for a file readable by the server, and {"command": "algorithms"}
+    lists the available algorithms. The server answers with JSON lines carrying the request id:
+    {"event": "queued"}, then {"event": "progress", "step", "total", "metrics"} every progress_every
+    steps, then {"event": "result", "cached", "metrics"}, or {"event": "error", "message"}.
+    Results go to a ResultCache keyed by trace hash + algorithm + config + seed. Cache hits replay the stored
+    progress when progress_every asks for it, and identical requests in flight share one run and its progress.
+    """
+
+    def __init__(self, workers=None, cache=None):
+        # Forked workers would inherit the open client sockets and keep them alive after we close them
+        self.context = multiprocessing.get_context('spawn')
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(workers, mp_context=self.context)
+        self.manager = self.context.Manager()  # Progress queues shared with the worker processes
+        self.cache = cache if cache is not None else ResultCache()
+        self.running = {}  # cache key -> SharedRun of the simulation in flight
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8765):
+        self.server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE)
+        return self.server
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await self.start(host, port)
+        print(f"MMU simulation service listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.pool.shutdown(cancel_futures=True)
+        self.manager.shutdown()
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    request_id = request.get('id')
+                    await self.handle_request(request, self._sender(writer, request_id))
+                except Exception as e:
+                    # Bad requests, failed simulations and a broken worker pool all end the request, not the server
+                    await self._sender(writer, request_id)({'event': 'error', 'message': str(e) or type(e).__name__})
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _sender(self, writer, request_id):
+        async def send(message):
+            message['id'] = request_id
+            writer.write((json.dumps(message) + '\n').encode())
+            await writer.drain()
+        return send
+
+    async def handle_request(self, request, send):
+        command = request.get('command', 'simulate')
+        if command == 'algorithms':
+            await send({'event': 'algorithms', 'algorithms': list(ALGORITHMS)})
+        elif command == 'simulate':
+            metrics, cached = await self.simulate(request, send)
+            await send({'event': 'result', 'cached': cached, 'metrics': metrics})
+        else:
+            raise ValueError(f"Unknown command {command}")
+
+    async def simulate(self, request, send):
+        """ Run or look up the simulation described by request; returns (metrics, cached) """
+        algorithm = request.get('algorithm')
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm {algorithm}")
+        if 'trace' in request:
+            operations = parse_operations(request['trace'].splitlines())
+        elif 'path' in request:
+            with open(request['path'], 'r') as file:
+                operations = parse_operations(file)
+        else:
+            raise ValueError("Request needs a trace or a path")
+        config = request.get('config') or {}
+        machine = MachineConfig(**config)  # Reject bad configs here instead of in a worker
+        seed = request.get('seed')
+        progress_every = int(request.get('progress_every', 0))
+
+        key = None
+        mmu_class = get_algorithm(algorithm)
+        if cacheable(mmu_class, machine, seed):
+            key = self.cache.key(trace_digest(operations), mmu_class, machine, seed)
+            entry = self.cache.get(key, progress_every)
+            if entry is not None:
+                if progress_every:
+                    for step in entry['steps']:
+                        metrics = dict(step)
+                        await send({'event': 'progress', 'step': metrics.pop('step'), 'total': len(operations),
+                                    'metrics': metrics})
+                return entry['metrics'], True
+            run = self.running.get(key)
+            if run is not None and (not progress_every or run.progress_every == progress_every):
+                # Shares a run already in flight; that is a miss, not a cache hit
+                await send({'event': 'queued'})
+                return (await run.follow(send, bool(progress_every)))['metrics'], False
+
+        await send({'event': 'queued'})
+        run = SharedRun(progress_every)
+        progress = self.manager.Queue() if progress_every else None
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, run_job, operations, algorithm, config, seed, progress_every, progress)
+        if key is not None and key not in self.running:
+            self.running[key] = run
+        # The run finishes, and is cached, even if this client goes away
+        run.task = asyncio.ensure_future(self._complete(run, key, future, progress))
+        return (await run.follow(send))['metrics'], False
+
+    async def _complete(self, run, key, future, progress):
+        try:
+            if progress is not None:
+                await self._collect_progress(run, future, progress)
+            entry = await future
+        except BrokenProcessPool as e:
+            # A worker died; later requests get a fresh pool instead of failing too
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=self.context)
+            run.finish(error=e)
+        except Exception as e:
+            run.finish(error=e)
+        else:
+            if key is not None:
+                with contextlib.suppress(OSError):  # A full or read-only cache must not fail the request
+                    self.cache.put(key, entry)
+            run.finish(entry)
+        finally:
+            if self.running.get(key) is run:
+                del self.running[key]
+
+    async def _collect_progress(self, run, future, progress):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                item = await loop.run_in_executor(None, progress.get, True, 0.2)
+            except queue.Empty:
+                if future.done():  # A worker that died never sends the final None
+                    return
+                continue
+            if item is None:
+                return
+            step, total, metrics = item
+            run.publish({'event': 'progress', 'step': step, 'total': total, 'metrics': metrics})
+
+
+async def submit(request, host='127.0.0.1', port=8765):
+    """ Send one request to a running service and yield its reply events until the result or an error """
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    try:
+        writer.write((json.dumps(request) + '\n').encode())
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            event = json.loads(line)
+            yield event
+            if event['event'] in ('result', 'error', 'algorithms'):
+                return
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local MMU simulation service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes, one per CPU by default")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--cache-size', type=int, default=64, help="Result cache size limit in MiB")
+    args = parser.parse_args()
+    service = SimulationService(args.workers, ResultCache(args.cache_dir, args.cache_size << 20))
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
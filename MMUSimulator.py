@@ -1,13 +1,11 @@
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import re
 
 # Importación de los módulos MMU
-from MMU import OPT_MMU, MRU_MMU, Random_MMU, FIFO_MMU, SecondChance_MMU
-
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-import re
+from MMU import ALGORITHMS, OPT_MMU, create_mmu, read_operations
+from ResultCache import ResultCache, run_cached
 
 
 class MMUSimulator(tk.Tk):
@@ -15,14 +13,11 @@ class MMUSimulator(tk.Tk):
         super().__init__()
         self.title("MMU Simulation")
         self.geometry("1400x900")
-        self.algorithms = {
-            'MRU': MRU_MMU(),
-            'Random': Random_MMU(),
-            'FIFO': FIFO_MMU(),
-            'SecondChance': SecondChance_MMU()
-        }
+        self.algorithms = {}  # MMUs built so far, each one only once its algorithm is selected
         self.current_mmu = None
         self.is_simulation_running = False
+        self.result_cache = ResultCache()
+        self.summary_results = None  # Queue the running summary thread reports to
         self.create_initial_widgets()
         self.create_simulation_widgets()
 
@@ -69,9 +64,52 @@ class MMUSimulator(tk.Tk):
             messagebox.showerror("Error", "MMU not selected or no operations loaded.")
             return
 
+        self.show_summary()
         self.is_simulation_running = True
         self.simulate_step()
 
+    def show_summary(self):
+        """ Final metrics of the whole trace for OPT and the selected algorithm, from the result cache when possible
+
+        The runs happen on a worker thread so the window stays responsive; the result is picked up by poll_summary.
+        """
+        name = self.algorithm_var.get()
+        mmu_class = type(self.current_mmu)
+        config = self.current_mmu.config
+        operations = list(self.operations)  # simulate_step consumes self.operations while the summary runs
+        results = queue.Queue()
+        self.summary_results = results  # A newer summary makes the results of an older one stale
+
+        def run():
+            try:
+                opt = run_cached(operations, OPT_MMU, config, cache=self.result_cache)
+                alg = run_cached(operations, mmu_class, config, cache=self.result_cache)
+                results.put((name, opt, alg, None))
+            except Exception as e:
+                results.put((name, None, None, e))
+
+        self.summary_var.set("Computing summary...")
+        threading.Thread(target=run, daemon=True).start()
+        self.after(100, self.poll_summary, results)
+
+    def poll_summary(self, results):
+        if results is not self.summary_results:
+            return
+        try:
+            name, opt, alg, error = results.get_nowait()
+        except queue.Empty:
+            self.after(100, self.poll_summary, results)
+            return
+        if error is not None:
+            self.summary_var.set("")
+            messagebox.showerror("Error", f"Summary failed: {str(error)}")
+            return
+        (opt, opt_cached), (alg, alg_cached) = opt, alg
+        print(f"OPT baseline{' (cached)' if opt_cached else ''}: {opt['metrics']}")
+        print(f"{name}{' (cached)' if alg_cached else ''}: {alg['metrics']}")
+        self.summary_var.set(f"OPT: {opt['metrics']['page_faults']} faults, {opt['metrics']['clock']} time | "
+                             f"{name}: {alg['metrics']['page_faults']} faults, {alg['metrics']['clock']} time")
+
     def setup_treeview(self, parent, name):
         tree = ttk.Treeview(parent, columns=("Page ID", "PID", "Loaded", "L-ADDR", "M-ADDR", "D-ADDR", "Loaded-T"),
                             show="headings")
@@ -97,7 +135,8 @@ class MMUSimulator(tk.Tk):
         ttk.Label(control_frame, text="Select Algorithm:").pack(side=tk.LEFT, padx=10)
         self.algorithm_var = tk.StringVar()
         self.algorithm_selector = ttk.Combobox(control_frame, textvariable=self.algorithm_var,
-                                               values=list(self.algorithms.keys()), state="readonly")
+                                               values=[name for name in ALGORITHMS if name != 'OPT'],
+                                               state="readonly")
         self.algorithm_selector.pack(side=tk.LEFT, padx=10)
         self.algorithm_selector.bind("<<ComboboxSelected>>", self.update_current_mmu)
 
@@ -108,8 +147,13 @@ class MMUSimulator(tk.Tk):
                                        command=self.start_simulation)
         self.start_button.pack(side=tk.LEFT, padx=10)
 
+        self.summary_var = tk.StringVar()
+        ttk.Label(control_frame, textvariable=self.summary_var).pack(side=tk.LEFT, padx=10)
+
     def update_current_mmu(self, event=None):
         selected_algorithm = self.algorithm_var.get()
+        if selected_algorithm not in self.algorithms:
+            self.algorithms[selected_algorithm] = create_mmu(selected_algorithm)
         self.current_mmu = self.algorithms[selected_algorithm]
         print(f"Algorithm {selected_algorithm} selected, MMU initialized.")
 
@@ -117,14 +161,7 @@ class MMUSimulator(tk.Tk):
         filepath = filedialog.askopenfilename()
         if filepath:
             print(f"Loaded operations from {filepath}")
-            self.operations = []
-            with open(filepath, "r") as file:
-                for line in file:
-                    parts = re.findall(r"(\w+)\(([\d,\s]+)\)", line.strip())
-                    if parts:
-                        command, args_str = parts[0]
-                        args = [int(x.strip()) for x in args_str.split(',')]
-                        self.operations.append((command, args))
+            self.operations = read_operations(filepath)
             print(f"Loaded {len(self.operations)} operations.")
             if self.current_mmu and self.operations:
                 self.start_button['state'] = tk.NORMAL
@@ -138,7 +175,7 @@ class MMUSimulator(tk.Tk):
                     print(f"Created new process {pid} with size {size}, pointer {ptr}")
                 elif command == "use":
                     ptr = args[0]
-                    self.current_mmu.use(ptr)
+                    self.current_mmu.use(*args)  # use(ptr) reads, use(ptr, 1) writes
                     print(f"Used pointer {ptr}")
                 elif command == "delete":
                     ptr = args[0]
@@ -0,0 +1,130 @@
+import heapq
+from collections import OrderedDict, deque
+
+from MMU import OPT_MMU, tag_operations, execute_operation
+
+
+class CPU:
+    def __init__(self, cpu_id):
+        self.cpu_id = cpu_id
+        self.time = 0  # Local simulated clock
+        self.run_queue = deque()  # pids assigned to this CPU, the running one first
+        self.slice_used = 0  # Ops run by the current pid in this time slice
+        self.cached_frames = 0  # Frames held in the per-CPU free list
+        self.busy_time = 0
+        self.lock_wait = 0
+        self.lock_acquisitions = 0
+        self.context_switches = 0
+        self.ops = 0
+
+
+class MultiCoreSimulator:
+    """ Run a trace split per pid on cpu_count simulated CPUs that share one MMU frame pool
+
+    Each CPU round-robins over its pids, time_slice ops at a time. Taking frames from or returning
+    them to the shared pool needs a global lock held for lock_cost; page hits never take it. With
+    frame_cache > 0 every CPU keeps a local free list refilled frame_cache frames at a time, so
+    the lock is only taken when that list runs dry or overflows. The cache is an allowance over
+    the MMU's single free pool: it changes lock traffic, not which frames the MMU hands out.
+    """
+
+    def __init__(self, mmu, cpu_count=2, time_slice=10, lock_cost=1, switch_cost=0, frame_cache=0):
+        if isinstance(mmu, OPT_MMU):
+            # The interleaving depends on each op's service time, so it is only known once the run is over
+            raise ValueError("OPT_MMU cannot be scheduled across CPUs: its future uses follow trace order")
+        self.mmu = mmu
+        self.cpus = [CPU(cpu_id) for cpu_id in range(cpu_count)]
+        self.time_slice = time_slice
+        self.lock_cost = lock_cost
+        self.switch_cost = switch_cost
+        self.frame_cache = frame_cache
+        self.lock_free_at = 0  # Simulated time at which the global lock is next free
+        self.ptr_ids = {}
+
+    def run(self, operations):
+        """ Run (command, args) operations and return the report """
+        queues = OrderedDict()  # pid -> deque of its tagged operations, in trace order
+        for pid, command, args, trace_ptr in tag_operations(operations, self.mmu.ptr_id_counter):
+            queues.setdefault(pid, deque()).append((command, args, trace_ptr))
+        for position, pid in enumerate(queues):
+            self.cpus[position % len(self.cpus)].run_queue.append(pid)
+
+        # Always advance the CPU that is furthest behind, so ops hit the MMU in simulated time order
+        ready = [(cpu.time, cpu.cpu_id) for cpu in self.cpus if cpu.run_queue]
+        heapq.heapify(ready)
+        while ready:
+            _, cpu_id = heapq.heappop(ready)
+            cpu = self.cpus[cpu_id]
+            pid = cpu.run_queue[0]
+            self._execute(cpu, queues[pid].popleft())
+            cpu.slice_used += 1
+            if not queues[pid]:
+                cpu.run_queue.popleft()
+                cpu.slice_used = 0
+            elif cpu.slice_used >= self.time_slice and len(cpu.run_queue) > 1:
+                cpu.run_queue.rotate(-1)
+                cpu.slice_used = 0
+                cpu.context_switches += 1
+                cpu.time += self.switch_cost
+            if cpu.run_queue:
+                heapq.heappush(ready, (cpu.time, cpu_id))
+        return self.report()
+
+    def _execute(self, cpu, operation):
+        mmu = self.mmu
+        clock, claimed, released = mmu.clock, mmu.frames_claimed, mmu.frames_released
+        execute_operation(mmu, self.ptr_ids, *operation)
+        service_time = mmu.clock - clock
+        acquisitions = self._lock_acquisitions(cpu, mmu.frames_claimed - claimed, mmu.frames_released - released)
+
+        start = cpu.time
+        if acquisitions:
+            start = max(cpu.time, self.lock_free_at)
+            self.lock_free_at = start + acquisitions * self.lock_cost
+            cpu.lock_wait += start - cpu.time
+            cpu.lock_acquisitions += acquisitions
+        busy = acquisitions * self.lock_cost + service_time
+        cpu.time = start + busy
+        cpu.busy_time += busy
+        cpu.ops += 1
+
+    def _lock_acquisitions(self, cpu, claimed, released):
+        """ Number of times this op must take the global frame pool lock """
+        if not self.frame_cache:
+            return (claimed > 0) + (released > 0)
+        acquisitions = 0
+        if claimed > cpu.cached_frames:
+            # Refill the local list with what is missing plus a full batch, in one acquisition
+            cpu.cached_frames += claimed - cpu.cached_frames + self.frame_cache
+            acquisitions += 1
+        cpu.cached_frames -= claimed
+        cpu.cached_frames += released
+        if cpu.cached_frames > 2 * self.frame_cache:
+            # Hand the overflow back to the global pool
+            cpu.cached_frames = self.frame_cache
+            acquisitions += 1
+        return acquisitions
+
+    def report(self):
+        makespan = max(cpu.time for cpu in self.cpus)
+        ops = sum(cpu.ops for cpu in self.cpus)
+        return {
+            'cpus': len(self.cpus),
+            'makespan': makespan,
+            'throughput': ops / makespan if makespan else 0.0,
+            'busy_time': sum(cpu.busy_time for cpu in self.cpus),
+            'lock_wait': sum(cpu.lock_wait for cpu in self.cpus),
+            'lock_acquisitions': sum(cpu.lock_acquisitions for cpu in self.cpus),
+            'context_switches': sum(cpu.context_switches for cpu in self.cpus),
+            'page_faults': self.mmu.page_faults,
+            'thrashing_time': self.mmu.thrashing_time,
+        }
+
+
+def scaling_report(operations, mmu_factory, core_counts=(1, 2, 4, 8), **options):
+    """ Run the trace on a fresh MMU from mmu_factory for each core count; returns {core count: report} """
+    reports = {}
+    for cpu_count in core_counts:
+        simulator = MultiCoreSimulator(mmu_factory(), cpu_count, **options)
+        reports[cpu_count] = simulator.run(operations)
+    return reports
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from MMU import MachineConfig, OPT_MMU, run_operations
+
+DEFAULT_CACHE_DIR = os.environ.get('MMU_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'mmu-simulator')
+# Part of every cache key. Bump it with any change to the simulator that can change results for the same
+# trace, policy, config and seed, so entries written by older code stop matching instead of being served.
+CACHE_VERSION = 1
+
+
+def trace_digest(operations):
+    """ Content hash of a parsed trace, so spacing or comments in the trace file do not change it """
+    digest = hashlib.sha256()
+    for command, args in operations:
+        digest.update(f"{command}({','.join(map(str, args))})\n".encode())
+    return digest.hexdigest()
+
+
+def simulate(operations, mmu_class, config=None, seed=None, summary_every=0, on_step=None):
+    """ Run operations on a fresh mmu_class MMU and return its result entry
+
+    The entry holds the final metrics and, when summary_every is set, a metrics snapshot every summary_every
+    steps (and at the last one). on_step(step, total, metrics) is called with each snapshot.
+    """
+    mmu = mmu_class(config, seed=seed)
+    if isinstance(mmu, OPT_MMU):
+        mmu.precalculate_future_uses(operations)
+    total = len(operations)
+    steps = []
+
+    step_hook = None
+    if summary_every:
+        def step_hook(mmu, step):
+            if step % summary_every == 0 or step == total:
+                metrics = mmu.metrics_report()
+                steps.append(dict(metrics, step=step))
+                if on_step is not None:
+                    on_step(step, total, metrics)
+
+    run_operations(mmu, operations, step_hook)
+    return {'metrics': mmu.metrics_report(), 'summary_every': summary_every, 'steps': steps}
+
+
+class ResultCache:
+    """ On-disk simulation results, content-addressed by trace hash, MMU class, machine config, seed and CACHE_VERSION
+
+    Each entry is one JSON file named by its key. Reading an entry refreshes its mtime, and once the
+    directory grows past max_bytes the entries with the oldest mtime are removed first (LRU).
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=64 << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(digest, mmu_class, config=None, seed=None):
+        name = mmu_class if isinstance(mmu_class, str) else mmu_class.__name__
+        config = config or MachineConfig()
+        return hashlib.sha256(f"{CACHE_VERSION}|{digest}|{name}|{config!r}|{seed!r}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key, summary_every=0):
+        """ Cached entry for key, or None; entries recorded with other summary steps miss when summaries are wanted """
+        path = self._path(key)
+        try:
+            with open(path, 'r') as file:
+                entry = json.load(file)
+            if summary_every and entry.get('summary_every') != summary_every:
+                entry = None
+            else:
+                os.utime(path)
+        except (OSError, ValueError):
+            entry = None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        # Write to a temporary file and rename it, so readers never see half an entry
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w') as file:
+                json.dump(entry, file)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self.evict()
+
+    def evict(self):
+        """ Remove least recently used entries until the cache fits in max_bytes """
+        entries = []
+        total = 0
+        for item in os.scandir(self.directory):
+            if item.name.endswith('.json'):
+                stat = item.stat()
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for item in os.scandir(self.directory):
+            if item.name.endswith('.json'):
+                os.unlink(item.path)
+
+
+def cacheable(mmu_class, config=None, seed=None):
+    """ Runs that depend on an unseeded random generator are not worth caching """
+    config = config or MachineConfig()
+    return seed is not None or not (mmu_class.randomized or config.uses_randomness())
+
+
+def run_cached(operations, mmu_class, config=None, seed=None, summary_every=0, cache=None):
+    """ Result entry of running operations on mmu_class, from cache when possible; returns (entry, cached) """
+    if cache is None or not cacheable(mmu_class, config, seed):
+        return simulate(operations, mmu_class, config, seed, summary_every), False
+    key = cache.key(trace_digest(operations), mmu_class, config, seed)
+    entry = cache.get(key, summary_every)
+    if entry is not None:
+        return entry, True
+    entry = simulate(operations, mmu_class, config, seed, summary_every)
+    cache.put(key, entry)
+    return entry, False